@@ -1,15 +1,59 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, current_app
+from flask import Flask, render_template, redirect, url_for, request, flash, current_app, jsonify
 from flask_login import LoginManager, current_user
-from flask_jwt_extended import JWTManager, jwt_required
+from flask_jwt_extended import JWTManager, jwt_required, get_jwt_identity
 from config import Config
-from utils.db import close_db
+from utils.db import get_db, close_client, ensure_indexes
+from utils.write_behind import write_behind
+from utils.captcha import captcha
+from utils.rate_limit import limiter
+from werkzeug.middleware.proxy_fix import ProxyFix
 from models.user import User
+from models.registry import model_registry
+from models.prediction_cache import prediction_cache, predict_cached
+from models.predictions import record_prediction
+from models.patient_import import backfill_search_fields
 from routes.auth import auth_bp
 from routes.admin import admin_bp
+from routes.api import api_bp
+from routes.health import health_bp
+from routes import metrics as metrics_routes
+from utils.metrics import PREDICTION_STAGE_SECONDS
+import threading
+import atexit
+
+def create_indexes(app):
+    with app.app_context():
+        try:
+            db = get_db()
+            ensure_indexes(db)
+            # Patients stored before the lowercased search fields existed
+            backfill_search_fields(db)
+        except Exception as e:
+            app.logger.error(f"Index creation failed: {e}")
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+
+    # Shared, hot-reloadable model for this worker
+    model_registry.init_app(app)
+    prediction_cache.init_app(app)
+
+    # Batched background inserts (predictions, audit events, new patients)
+    write_behind.init_app(app)
+
+    # Client addresses from X-Forwarded-For when behind that many proxies
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
+
+    # Login CAPTCHA backend (reCAPTCHA, or a stub for tests and offline use)
+    captcha.init_app(app)
+
+    # Sliding-window limits on login and registration attempts
+    limiter.init_app(app)
+
+    # Request latency histograms and the /metrics endpoint
+    metrics_routes.init_app(app)
     
     # Initialize Flask-Login
     login_manager = LoginManager()
@@ -25,27 +69,46 @@ def create_app():
     jwt = JWTManager(app)
 
     
+    # API clients get JSON errors instead of a redirect to the login page
+    def is_api_request():
+        return request.blueprint == 'api'
+
     @jwt.unauthorized_loader
     def custom_unauth_loader(reason):
+        if is_api_request():
+            return jsonify(error=reason), 401
         flash("You must log in to access this page.", "error")
         return redirect(url_for("auth.login"))
 
     @jwt.invalid_token_loader
     def custom_invalid_loader(reason):
+        if is_api_request():
+            return jsonify(error=reason), 422
         flash("Session expired or invalid, please log in again.", "error")
         return redirect(url_for("auth.login"))
 
     @jwt.expired_token_loader
     def custom_expired_loader(header, payload):
+        if is_api_request():
+            return jsonify(error="Token has expired"), 401
         flash("Your session has expired. Please log in again.", "error")
         return redirect(url_for("auth.login"))
 
-    # Close database connection when app context ends
-    app.teardown_appcontext(close_db)
+    # Requests borrow connections from the per-process pool; the client
+    # itself lives until the worker exits
+    atexit.register(close_client)
+
+    # Build indexes in the background so a slow or unreachable Mongo
+    # does not hold up startup
+    if app.config['MONGO_ENSURE_INDEXES']:
+        threading.Thread(target=create_indexes, args=(app,), daemon=True,
+                         name='ensure-indexes').start()
     
-    # Register authentication and admin blueprints
+    # Register authentication, admin, JSON API and health check blueprints
     app.register_blueprint(auth_bp, url_prefix='/auth')
     app.register_blueprint(admin_bp, url_prefix='/admin')
+    app.register_blueprint(api_bp, url_prefix='/api/v1')
+    app.register_blueprint(health_bp)
     
     # Core routes
 
@@ -76,32 +139,33 @@ def create_app():
             return render_template('predict.html')
         # POST → handle submission
         try:
-            user_data = [
-                float(request.form['glucose']),
-                float(request.form['blood_pressure']),
-                float(request.form['skin_thickness']),
-                float(request.form['insulin']),
-                float(request.form['bmi']),
-                float(request.form['diabetes_pedigree']),
-                float(request.form['age'])
-            ]
-
-            # Run your ML predictor
-            from models.diabetes_model import DiabetesPredictor
-            predictor = DiabetesPredictor()
-            predictor.load_model()
-            result = predictor.predict(user_data)
+            with PREDICTION_STAGE_SECONDS.time('parse_form'):
+                user_data = [
+                    float(request.form['glucose']),
+                    float(request.form['blood_pressure']),
+                    float(request.form['skin_thickness']),
+                    float(request.form['insulin']),
+                    float(request.form['bmi']),
+                    float(request.form['diabetes_pedigree']),
+                    float(request.form['age'])
+                ]
+
+            # Run your ML predictor (repeated inputs are served from cache)
+            result = predict_cached(user_data)
 
             if not result:
                 raise RuntimeError("Prediction returned no result")
+            with PREDICTION_STAGE_SECONDS.time('record'):
+                record_prediction(result, user_data, user_id=get_jwt_identity(), source='web')
 
-            return render_template(
-                'result.html',
-                prediction=result['prediction'],
-                risk_percentage=result['risk_percentage'],
-                confidence=result['confidence'],
-                user_data=user_data
-            )
+            with PREDICTION_STAGE_SECONDS.time('render'):
+                return render_template(
+                    'result.html',
+                    prediction=result['prediction'],
+                    risk_percentage=result['risk_percentage'],
+                    confidence=result['confidence'],
+                    user_data=user_data
+                )
         except KeyError as e:
             flash(f"Missing form field: {e.args[0]}", 'error')
         except ValueError:
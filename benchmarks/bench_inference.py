@@ -0,0 +1,49 @@
+"""Model load, single-row latency (cold and warm) and batch throughput."""
+import time
+
+from common import quiet, result, timings, median, p95, path_size, synthetic_inputs
+
+from models.artifact import default_model_path, resolve_version_dir
+from models.serving import ServingPredictor
+
+SAMPLE = [140, 78, 35, 100, 25, 0.65, 50]
+
+
+def load_predictor(model_path):
+    predictor = ServingPredictor()
+    with quiet():
+        predictor.load_model(model_path)
+    # Build the inference pipeline, as the model registry does
+    predictor.pipeline
+    return predictor
+
+
+def run(model_path=None, batch_rows=(1000, 100000), repeat=200):
+    model_path = model_path or default_model_path()
+    results = []
+
+    load_times = timings(lambda: load_predictor(model_path), max(3, repeat // 40))
+    results.append(result('inference.load.seconds', median(load_times), 's'))
+    results.append(result('inference.model.size_bytes', path_size(resolve_version_dir(model_path)), 'bytes'))
+
+    # Cold: the first prediction of a freshly loaded model, which pays for
+    # anything loaded lazily on the way
+    predictor = ServingPredictor()
+    with quiet():
+        predictor.load_model(model_path)
+    start = time.perf_counter()
+    predictor.predict(SAMPLE)
+    results.append(result('inference.predict.cold_ms', (time.perf_counter() - start) * 1000, 'ms'))
+
+    rows = synthetic_inputs(repeat, seed=1).tolist()
+    rows_iter = iter(rows)
+    warm = timings(lambda: predictor.predict(next(rows_iter)), repeat)
+    results.append(result('inference.predict.warm_p50_ms', median(warm) * 1000, 'ms'))
+    results.append(result('inference.predict.warm_p95_ms', p95(warm) * 1000, 'ms'))
+
+    for n in batch_rows:
+        X = synthetic_inputs(n, seed=2)
+        predictor.predict_batch(X[:1000])
+        seconds = median(timings(lambda: predictor.predict_batch(X), 3))
+        results.append(result(f'inference.batch.rows_per_s[rows={n}]', n / seconds, 'rows/s', 'higher'))
+    return results
@@ -0,0 +1,47 @@
+"""Training wall time and model size per estimator, in memory and out of core."""
+import os
+import tempfile
+import time
+
+from common import DATA_PATH, quiet, result, path_size, write_synthetic_csv
+
+from models.diabetes_model import DiabetesPredictor
+
+
+def train_one(name, data_path, artifact_root):
+    predictor = DiabetesPredictor(n_workers=1)
+    predictor.models = {name: predictor.models[name]}
+    start = time.perf_counter()
+    with quiet():
+        predictor.train_model(data_path=data_path)
+    seconds = time.perf_counter() - start
+    with quiet():
+        predictor.save_model(artifact_root)
+    return seconds
+
+
+def run(estimators=None, synthetic_rows=(100000,), incremental_rows=(1000000,), workdir=None):
+    workdir = workdir or tempfile.mkdtemp(prefix='bench-training-')
+    estimators = estimators or list(DiabetesPredictor(build_models=True).models)
+    results = []
+
+    datasets = [('diabetes', DATA_PATH)]
+    for rows in synthetic_rows:
+        path = os.path.join(workdir, f'synthetic-{rows}.csv')
+        datasets.append((f'synthetic{rows}', write_synthetic_csv(path, rows)))
+
+    for dataset, path in datasets:
+        for name in estimators:
+            root = os.path.join(workdir, f'artifacts-{dataset}-{name}')
+            seconds = train_one(name, path, root)
+            results.append(result(f'training.{name}.seconds[data={dataset}]', seconds, 's'))
+            results.append(result(f'training.{name}.model_bytes[data={dataset}]', path_size(root), 'bytes'))
+
+    for rows in incremental_rows:
+        path = write_synthetic_csv(os.path.join(workdir, f'incremental-{rows}.csv'), rows)
+        predictor = DiabetesPredictor(n_workers=1)
+        start = time.perf_counter()
+        with quiet():
+            predictor.train_incremental(path, epochs=3)
+        results.append(result(f'training.incremental.seconds[rows={rows}]', time.perf_counter() - start, 's'))
+    return results
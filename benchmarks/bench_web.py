@@ -0,0 +1,94 @@
+"""End-to-end /predict and /admin/ throughput through the Flask test client.
+
+MongoDB is replaced by mongomock (pip install -r benchmarks/requirements.txt),
+so the numbers cover the application code, not a database server.
+"""
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from common import quiet, result, timings, median, p95, synthetic_inputs
+
+from models.features import INPUT_FIELDS
+
+ADMIN_PASSWORD = 'Bench@Password1'
+
+
+def make_app(workdir):
+    import mongomock
+    import utils.db
+
+    os.environ.setdefault('SECRET_KEY', uuid.uuid4().hex)
+    os.environ.setdefault('JWT_SECRET_KEY', uuid.uuid4().hex)
+    client = mongomock.MongoClient()
+    utils.db.MongoClient = lambda *args, **kwargs: client
+
+    from app import create_app
+    app = create_app()
+    app.config.update(TESTING=True, MONGO_ENSURE_INDEXES=False,
+                      WRITE_BEHIND_SPILL_DIR=os.path.join(workdir, 'spill'))
+    return app, client[app.config['DB_NAME']]
+
+
+def logged_in_client(app, role):
+    from flask_jwt_extended import create_access_token
+    from models.user import User
+    username = f'bench{role}'
+    with app.app_context():
+        user = User.get_by_username(username) or \
+            User.create_user(username, f'{username}@example.com', ADMIN_PASSWORD, role=role)
+        token = create_access_token(identity=user.id)
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = user.id
+        session['_fresh'] = True
+    client.set_cookie('access_token_cookie', token)
+    return client
+
+
+def seed_patients(db, count):
+    now = datetime.utcnow()
+    db.patients.insert_many([
+        {'_id': str(uuid.uuid4()), 'name': f'Patient {i}', 'phone': f'555{i:07d}',
+         'email': f'patient{i}@example.com', 'created_at': now - timedelta(seconds=i),
+         **dict(zip(INPUT_FIELDS, row))}
+        for i, row in enumerate(synthetic_inputs(count, seed=3).tolist())
+    ])
+
+
+def throughput(name, fn, requests):
+    fn()
+    samples = timings(fn, requests)
+    return [
+        result(f'{name}.requests_per_s', requests / sum(samples), 'req/s', 'higher'),
+        result(f'{name}.p50_ms', median(samples) * 1000, 'ms'),
+        result(f'{name}.p95_ms', p95(samples) * 1000, 'ms'),
+    ]
+
+
+def run(requests=300, patients=1000):
+    workdir = tempfile.mkdtemp(prefix='bench-web-')
+    with quiet():
+        app, db = make_app(workdir)
+        seed_patients(db, patients)
+        user = logged_in_client(app, 'user')
+        admin = logged_in_client(app, 'admin')
+        # Load the model before timing
+        user.post('/predict', data=dict(zip(INPUT_FIELDS, map(str, [140, 78, 35, 100, 25, 0.65, 50]))))
+
+    forms = [dict(zip(INPUT_FIELDS, map(str, row))) for row in synthetic_inputs(requests + 1, seed=4).tolist()]
+    distinct = iter(forms)
+
+    def check(response):
+        if response.status_code != 200:
+            raise RuntimeError(f"Unexpected status {response.status_code}")
+
+    results = []
+    with quiet():
+        results += throughput('web.predict.cached', lambda: check(user.post('/predict', data=forms[0])), requests)
+        results += throughput('web.predict.uncached',
+                              lambda: check(user.post('/predict', data=next(distinct))), requests)
+        results += throughput('web.admin.dashboard', lambda: check(admin.get('/admin/')), requests)
+    return results
@@ -0,0 +1,149 @@
+"""Shared helpers for the benchmark suite (see benchmarks/run.py)."""
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from models.features import RAW_FEATURES
+
+DATA_PATH = os.path.join(REPO_ROOT, 'data', 'diabetes.csv')
+
+# Decimals of each column in data/diabetes.csv, kept in synthetic rows
+COLUMN_DECIMALS = {
+    'Glucose': 0, 'BloodPressure': 0, 'SkinThickness': 0, 'Insulin': 0,
+    'BMI': 1, 'DiabetesPedigreeFunction': 3, 'Age': 0,
+}
+SYNTHETIC_CHUNK_ROWS = 250000
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence the print-heavy training and loading code."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def result(name, value, unit, better='lower'):
+    """One benchmark measurement; ``better`` is 'lower' or 'higher'."""
+    return {'name': name, 'value': float(value), 'unit': unit, 'better': better}
+
+
+def timings(fn, repeat):
+    """Wall time in seconds of ``repeat`` calls of ``fn``."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def p95(samples):
+    return float(np.percentile(samples, 95))
+
+
+def median(samples):
+    return statistics.median(samples)
+
+
+def path_size(path):
+    """Bytes of a file, or of every file under a directory."""
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(path) for name in names)
+
+
+def synthetic_frame(rows, seed=0):
+    """``rows`` dataset rows resampled from data/diabetes.csv with ±5% jitter.
+
+    Zeros ("not measured") stay zero and every column keeps its decimals, so
+    the data exercises imputation and split points like the real file.
+    """
+    base = pd.read_csv(DATA_PATH)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), rows)].reset_index(drop=True)
+    for column, decimals in COLUMN_DECIMALS.items():
+        jittered = df[column].to_numpy(dtype=np.float64) * rng.normal(1.0, 0.05, rows)
+        df[column] = np.round(jittered, decimals)
+        if decimals == 0:
+            df[column] = df[column].astype(np.int64)
+    return df
+
+
+def synthetic_inputs(rows, seed=0):
+    return synthetic_frame(rows, seed)[RAW_FEATURES].to_numpy(dtype=np.float64)
+
+
+def write_synthetic_csv(path, rows, seed=0):
+    """Write a synthetic dataset in chunks, so millions of rows fit in memory."""
+    written = 0
+    for chunk_no, start in enumerate(range(0, rows, SYNTHETIC_CHUNK_ROWS)):
+        n = min(SYNTHETIC_CHUNK_ROWS, rows - start)
+        synthetic_frame(n, seed + chunk_no).to_csv(path, mode='a' if written else 'w',
+                                                   header=not written, index=False)
+        written += n
+    return path
+
+
+def environment():
+    def version(module):
+        try:
+            return __import__(module).__version__
+        except ImportError:
+            return None
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'created_at': datetime.utcnow().isoformat() + 'Z',
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'libraries': {name: version(name) for name in ('numpy', 'pandas', 'sklearn', 'xgboost', 'flask')},
+    }
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_results(path, report):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def compare(results, baseline_results, threshold):
+    """``(name, baseline, current, change, regressed)`` for results present in both.
+
+    A result regresses when it is worse than the baseline by more than
+    ``threshold`` (a fraction), in the direction given by its ``better``.
+    """
+    baseline = {r['name']: r for r in baseline_results}
+    rows = []
+    for current in results:
+        before = baseline.get(current['name'])
+        if before is None or not before['value']:
+            continue
+        change = current['value'] / before['value'] - 1
+        worse = change if current['better'] == 'lower' else -change
+        rows.append((current['name'], before['value'], current['value'], change, worse > threshold))
+    return rows
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Run the benchmark suite, save the results and compare them with a baseline.
+
+    python benchmarks/run.py                         # everything, default sizes
+    python benchmarks/run.py --quick                 # small sizes, for a quick check
+    python benchmarks/run.py --suite inference web   # selected suites
+    python benchmarks/run.py --save-baseline         # record the reference numbers
+
+Results are written as JSON (--output). With a baseline file present, every
+result that is worse than its baseline value by more than --threshold is
+reported and the exit status is 1.
+"""
+import argparse
+import importlib
+import os
+import sys
+
+from common import REPO_ROOT, environment, save_results, load_results, compare
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, 'results', 'latest.json')
+SUITES = ('inference', 'training', 'web')
+
+
+def suite_kwargs(args):
+    if args.quick:
+        return {
+            'inference': {'model_path': args.model, 'batch_rows': (1000, 10000), 'repeat': 50},
+            'training': {'estimators': args.estimators, 'synthetic_rows': (5000,), 'incremental_rows': (20000,)},
+            'web': {'requests': 50, 'patients': 200},
+        }
+    return {
+        'inference': {'model_path': args.model, 'batch_rows': tuple(args.batch_rows), 'repeat': args.repeat},
+        'training': {'estimators': args.estimators, 'synthetic_rows': tuple(args.train_rows),
+                     'incremental_rows': tuple(args.incremental_rows)},
+        'web': {'requests': args.requests, 'patients': args.patients},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark inference, training and web routes.")
+    parser.add_argument("--suite", nargs="+", choices=SUITES, default=list(SUITES))
+    parser.add_argument("--quick", action="store_true", help="small sizes for a fast smoke run")
+    parser.add_argument("--model", help="model artifact or .pkl for the inference suite (default: the served model)")
+    parser.add_argument("--batch-rows", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--repeat", type=int, default=200, help="single-row predictions to time")
+    parser.add_argument("--estimators", nargs="+", help="training candidates (default: all)")
+    parser.add_argument("--train-rows", type=int, nargs="+", default=[100000],
+                        help="synthetic dataset sizes for train_model (data/diabetes.csv is always included)")
+    parser.add_argument("--incremental-rows", type=int, nargs="+", default=[1000000],
+                        help="synthetic dataset sizes for the out-of-core training mode")
+    parser.add_argument("--requests", type=int, default=300, help="requests per web benchmark")
+    parser.add_argument("--patients", type=int, default=1000, help="patients seeded for the admin dashboard")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown (fraction) before a result counts as a regression")
+    args = parser.parse_args()
+
+    kwargs = suite_kwargs(args)
+    results = []
+    for suite in args.suite:
+        print(f"⏱️  Running {suite} benchmarks...")
+        try:
+            module = importlib.import_module(f'bench_{suite}')
+        except ImportError as e:
+            print(f"⚠️  Skipping {suite}: {e}")
+            continue
+        for row in module.run(**kwargs[suite]):
+            print(f"   {row['name']:<55} {row['value']:>14.3f} {row['unit']}")
+            results.append(row)
+
+    report = {'environment': environment(), 'quick': args.quick, 'results': results}
+    save_results(args.output, report)
+    print(f"\n📄 Results saved to {os.path.relpath(args.output, REPO_ROOT)}")
+    if args.save_baseline:
+        save_results(args.baseline, report)
+        print(f"📌 Baseline saved to {os.path.relpath(args.baseline, REPO_ROOT)}")
+        return 0
+    if not os.path.isfile(args.baseline):
+        print("ℹ️  No baseline to compare with; run with --save-baseline to record one.")
+        return 0
+
+    baseline = load_results(args.baseline)
+    if baseline.get('quick') != args.quick:
+        print("⚠️  Baseline was recorded with different sizes (--quick); comparing anyway.")
+    rows = compare(results, baseline['results'], args.threshold)
+    regressions = [row for row in rows if row[4]]
+    print(f"\nCompared {len(rows)} results with the baseline "
+          f"({baseline['environment'].get('commit')}, threshold {args.threshold:.0%}):")
+    for name, before, current, change, regressed in rows:
+        mark = "❌" if regressed else "  "
+        print(f"{mark} {name:<55} {before:>12.3f} -> {current:>12.3f} ({change:+.1%})")
+    if regressions:
+        print(f"\n❌ {len(regressions)} regression(s) beyond {args.threshold:.0%}.")
+        return 1
+    print("\n✅ No regressions.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import subprocess
+import sys
+
+# Training-only libraries that a web worker must not import at startup
+TRAINING_MODULES = ("sklearn", "xgboost", "pandas", "scipy")
+
+def run(code):
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                            capture_output=True, text=True, check=True)
+    return result.stdout, result.stderr
+
+def import_times(stderr):
+    """(module, self µs, cumulative µs, depth) per line of -X importtime output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the web app's import time against a budget.")
+    parser.add_argument("--module", default="app")
+    parser.add_argument("--budget-ms", type=float, default=800.0,
+                        help="fail if importing the module takes longer (best of --runs)")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    code = f"import sys, json, {args.module}; print(json.dumps(sorted(sys.modules)))"
+    best, rows, loaded = None, [], []
+    for _ in range(args.runs):
+        stdout, stderr = run(code)
+        run_rows = import_times(stderr)
+        total = next(cum for name, _, cum, depth in run_rows if name == args.module and depth == 0)
+        if best is None or total < best:
+            best, rows, loaded = total, run_rows, json.loads(stdout)
+
+    print(f"import {args.module}: {best / 1000:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    print(f"Slowest direct imports of {args.module}:")
+    direct = [r for r in rows if r[3] == 1]
+    for name, _, cumulative, _ in sorted(direct, key=lambda r: -r[2])[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    heavy = sorted({m.split(".")[0] for m in loaded} & set(TRAINING_MODULES))
+    ok = best / 1000 <= args.budget_ms and not heavy
+    if heavy:
+        print(f"❌ Training libraries imported at startup: {', '.join(heavy)}")
+    if best / 1000 > args.budget_ms:
+        print("❌ Import time over budget")
+    if ok:
+        print("✅ Within budget")
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -10,16 +10,79 @@ class Config:
     MONGODB_URI = os.getenv("MONGODB_URI")
     DB_NAME = "diabetes_app"
 
+    # MongoDB connection pool (one client per worker process)
+    MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", 50))
+    MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", 300000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", 5000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", 5000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", 20000))
+
     # reCAPTCHA v2 keys (no fallback values for security)
     RECAPTCHA_PUBLIC_KEY = os.getenv("RECAPTCHA_SITE_KEY")
     RECAPTCHA_PRIVATE_KEY = os.getenv("RECAPTCHA_SECRET_KEY")
+    CAPTCHA_BACKEND = os.getenv("CAPTCHA_BACKEND", "recaptcha")  # recaptcha, stub (tests/offline) or disabled
+    CAPTCHA_TIMEOUT = float(os.getenv("CAPTCHA_TIMEOUT_SECONDS", 3))
+    CAPTCHA_POOL_SIZE = int(os.getenv("CAPTCHA_POOL_SIZE", 10))  # keep-alive connections to siteverify per worker
+    CAPTCHA_CACHE_SIZE = int(os.getenv("CAPTCHA_CACHE_SIZE", 10000))  # verified tokens remembered to reject replays
+    CAPTCHA_CACHE_TTL = float(os.getenv("CAPTCHA_CACHE_TTL_SECONDS", 120))  # reCAPTCHA tokens expire after 2 minutes
+
+    # Login/registration throttling (sliding window, per client IP and per username)
+    RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", 300))
+    RATE_LIMIT_LOGIN_PER_IP = int(os.getenv("RATE_LIMIT_LOGIN_PER_IP", 30))  # login attempts per window; 0 disables a limit
+    RATE_LIMIT_LOGIN_PER_USERNAME = int(os.getenv("RATE_LIMIT_LOGIN_PER_USERNAME", 5))  # failed logins per window
+    RATE_LIMIT_REGISTER_PER_IP = int(os.getenv("RATE_LIMIT_REGISTER_PER_IP", 10))
+    RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))  # per-process store size
+    RATE_LIMIT_PATH = os.getenv("RATE_LIMIT_PATH")  # SQLite file shared by workers; unset = per-process only
+    PROXY_FIX_X_FOR = int(os.getenv("PROXY_FIX_X_FOR", 0))  # trusted proxies in front of the app (X-Forwarded-For)
+
+    # In-process user lookup cache (Flask-Login / JWT identity resolution)
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 2048))
+    USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL_SECONDS", 5))  # role changes reach other workers within this
 
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
     JWT_ACCESS_TOKEN_EXPIRES = int(os.getenv("JWT_ACCESS_EXPIRES_SECONDS", 3600))
     JWT_REFRESH_TOKEN_EXPIRES = int(os.getenv("JWT_REFRESH_EXPIRES_SECONDS", 86400))
-    JWT_TOKEN_LOCATION = ["cookies"] 
+    JWT_TOKEN_LOCATION = ["cookies", "headers"]  # headers: Bearer tokens for /api/v1
     JWT_ACCESS_COOKIE_NAME = "access_token_cookie"
     JWT_REFRESH_COOKIE_NAME = "refresh_token_cookie"
     JWT_COOKIE_SECURE = False  # Set to True in production with HTTPS
     JWT_COOKIE_CSRF_PROTECT = False
+
+    # Model serving
+    MODEL_PATH = os.getenv("MODEL_PATH")  # defaults to models/diabetes_model.pkl
+    MODEL_RELOAD_INTERVAL = float(os.getenv("MODEL_RELOAD_INTERVAL_SECONDS", 5))
+    MODEL_PRELOAD = os.getenv("MODEL_PRELOAD", "true").lower() == "true"  # wsgi.py loads the model before gunicorn forks
+    PREDICTION_CACHE_ENABLED = os.getenv("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+    PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", 4096))
+    PREDICTION_CACHE_TTL = float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", 3600))
+    PREDICTION_CACHE_DECIMALS = int(os.getenv("PREDICTION_CACHE_DECIMALS", 3))  # inputs are rounded before scoring
+    PREDICTION_CACHE_PATH = os.getenv("PREDICTION_CACHE_PATH")  # SQLite file shared by workers; unset = per-process only
+    INFERENCE_ENGINE_MAX_ROWS = int(os.getenv("INFERENCE_ENGINE_MAX_ROWS", 32))  # 0 disables the NumPy tree engine
+
+    # Write-behind queue for background inserts (patients, predictions, audit events)
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 500))
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL_SECONDS", 0.25))
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 10000))
+    WRITE_BEHIND_PUT_TIMEOUT = float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT_SECONDS", 1.0))  # then spill to disk
+    WRITE_BEHIND_SPILL_DIR = os.getenv("WRITE_BEHIND_SPILL_DIR",
+                                       os.path.join(os.path.dirname(os.path.abspath(__file__)), "spill"))
+    WRITE_BEHIND_RETRY_INTERVAL = float(os.getenv("WRITE_BEHIND_RETRY_INTERVAL_SECONDS", 60))
+
+    # Prometheus-style /metrics endpoint (per worker process)
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_TOKEN = os.getenv("METRICS_TOKEN")  # if set, scrapes need "Authorization: Bearer <token>"
+
+    # Admin dashboard
+    ADMIN_PAGE_SIZE = int(os.getenv("ADMIN_PAGE_SIZE", 50))
+    REPORT_MAX_DAYS = int(os.getenv("REPORT_MAX_DAYS", 366))  # longest range the prediction reports accept
+    PATIENT_IMPORT_CHUNK_SIZE = int(os.getenv("PATIENT_IMPORT_CHUNK_SIZE", 5000))  # rows read, validated and inserted at a time
+    PATIENT_IMPORT_MAX_REJECTS = int(os.getenv("PATIENT_IMPORT_MAX_REJECTS", 1000))  # rejected rows listed after an import
+    MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+
+    # JSON API
+    API_PREDICT_CHUNK_SIZE = int(os.getenv("API_PREDICT_CHUNK_SIZE", 1000))
+    API_MAX_RECORD_SIZE = int(os.getenv("API_MAX_RECORD_SIZE", 64 * 1024))  # characters per JSON record; larger bodies are cut off
@@ -0,0 +1,81 @@
+"""gunicorn settings for serving the app: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+Every setting can be overridden from the environment (see below) or on the
+command line. The master imports wsgi.py before forking (``preload_app``),
+so the workers share one copy of the model. The master also watches the
+model artifact: when a new version is published it loads it and sends
+itself SIGHUP, and gunicorn replaces the workers gracefully with new ones
+forked from the updated master. Old workers finish their requests first.
+"""
+import gc
+import os
+import signal
+import threading
+import time
+
+# One BLAS/OpenMP thread per request thread; workers x threads already use every core
+for var in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS"):
+    os.environ.setdefault(var, "1")
+
+# Cores this process may run on (container CPU sets included)
+CORES = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{os.getenv('PORT', '8000')}")
+
+# Predictions are CPU-bound, so one worker process per core; the threads of
+# a worker overlap MongoDB round trips and keep a slow request from
+# blocking the others
+workers = int(os.getenv("GUNICORN_WORKERS", CORES))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 4))
+
+preload_app = True
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 60))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+# Worker heartbeats in memory rather than on a possibly slow container filesystem
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+
+def _master_watches_model(server):
+    return server.cfg.preload_app and server.app.wsgi().config["MODEL_PRELOAD"]
+
+
+def _watch_model(server, interval):
+    from models.registry import model_registry
+    while True:
+        time.sleep(interval)
+        try:
+            if model_registry.refresh():
+                server.log.info("Model version %s loaded; restarting workers", model_registry.version)
+                os.kill(server.pid, signal.SIGHUP)
+        except Exception as e:
+            server.log.error("Model watcher error: %s", e)
+
+
+def when_ready(server):
+    if not _master_watches_model(server):
+        return
+    interval = server.app.wsgi().config["MODEL_RELOAD_INTERVAL"]
+    if interval > 0:
+        threading.Thread(target=_watch_model, args=(server, interval), daemon=True,
+                         name="model-watch").start()
+
+
+def pre_fork(server, worker):
+    # Keep the garbage collector from touching (and so copying) the
+    # preloaded objects in every worker
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    if _master_watches_model(server):
+        from models.registry import model_registry
+        # New versions arrive through the master; workers do not poll
+        model_registry.check_interval = float("inf")
@@ -0,0 +1,243 @@
+"""Versioned on-disk model artifacts.
+
+Layout of an artifact root::
+
+    artifacts/
+        CURRENT                      name of the active version
+        20260101T000000Z-1a2b3c4d/
+            manifest.json            model name/format, feature pipeline, data hash, metrics, versions
+            scaler.npz               StandardScaler statistics as raw arrays
+            model.ubj | model.joblib estimator in its native format
+            engine.npz               flattened tree ensemble (optional, see tree_engine.py)
+
+Versions are written to a temporary directory, renamed into place and then
+published by atomically replacing CURRENT, so readers never observe a
+half-written artifact.
+
+Serving reads the manifest, scaler statistics and engine with NumPy alone;
+scikit-learn or XGBoost are only imported if the estimator itself is loaded.
+"""
+import hashlib
+import json
+import os
+import platform
+import shutil
+import threading
+import uuid
+from datetime import datetime
+
+import numpy as np
+
+ARTIFACT_FORMAT = 1
+DEFAULT_ARTIFACT_ROOT = os.path.join(os.path.dirname(__file__), 'artifacts')
+LEGACY_MODEL_PATH = os.path.join(os.path.dirname(__file__), 'diabetes_model.pkl')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+SCALER_FILE = 'scaler.npz'
+ENGINE_FILE = 'engine.npz'
+
+
+def library_versions():
+    versions = {'python': platform.python_version(), 'numpy': np.__version__}
+    for name, module in (('scikit-learn', 'sklearn'), ('xgboost', 'xgboost'), ('joblib', 'joblib')):
+        try:
+            versions[name] = __import__(module).__version__
+        except ImportError:
+            pass
+    return versions
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def is_artifact_path(path):
+    """True for an artifact root (with CURRENT) or a single version directory."""
+    return os.path.isfile(os.path.join(path, CURRENT_FILE)) or \
+        os.path.isfile(os.path.join(path, MANIFEST_FILE))
+
+
+def default_model_path():
+    """The artifact root once a version was published, else the legacy pickle."""
+    if is_artifact_path(DEFAULT_ARTIFACT_ROOT):
+        return DEFAULT_ARTIFACT_ROOT
+    return LEGACY_MODEL_PATH
+
+
+def watch_file(path):
+    """File whose modification signals that a new model should be loaded."""
+    for name in (CURRENT_FILE, MANIFEST_FILE):
+        candidate = os.path.join(path, name)
+        if os.path.isfile(candidate):
+            return candidate
+    return path
+
+
+def resolve_version_dir(path):
+    current = os.path.join(path, CURRENT_FILE)
+    if os.path.isfile(current):
+        with open(current) as f:
+            return os.path.join(path, f.read().strip())
+    return path
+
+
+class ScalerStats:
+    """Fitted StandardScaler statistics, without importing scikit-learn."""
+
+    def __init__(self, mean, scale):
+        self.mean_ = mean
+        self.scale_ = scale
+
+
+def _model_format(model):
+    if type(model).__name__ == 'XGBClassifier':
+        return 'xgboost-ubj', 'model.ubj'
+    return 'joblib', 'model.joblib'
+
+
+def save_artifact(model, model_name, scaler, feature_names, root=DEFAULT_ARTIFACT_ROOT,
+                  training_data_hash=None, metrics=None, engine=None, feature_pipeline=None,
+                  parent_version=None, label_watermark=None, holdout=None):
+    """Write a new artifact version under ``root`` and make it current.
+
+    ``engine`` is a TreeEnsembleEngine already checked against ``model``;
+    ``feature_pipeline`` is the fitted FeaturePipeline the model was trained on.
+    Warm-start updates (models/model_update.py) record the version they
+    continued from and the ``labelled_at`` of the newest patient they used.
+    ``holdout`` describes how the training data was split, so the same test
+    rows can be found again (see DiabetesPredictor.holdout).
+    Returns the path of the version directory.
+    """
+    os.makedirs(root, exist_ok=True)
+    tmp_dir = os.path.join(root, f'.tmp-{uuid.uuid4().hex}')
+    os.makedirs(tmp_dir)
+
+    model_format, model_file = _model_format(model)
+    model_path = os.path.join(tmp_dir, model_file)
+    if model_format == 'xgboost-ubj':
+        model.save_model(model_path)
+    else:
+        import joblib
+        # Uncompressed so arrays can be memory-mapped on load
+        joblib.dump(model, model_path)
+    np.savez(os.path.join(tmp_dir, SCALER_FILE),
+             mean=scaler.mean_, scale=scaler.scale_, var=scaler.var_,
+             n_samples_seen=np.asarray(scaler.n_samples_seen_))
+    if engine is not None:
+        np.savez(os.path.join(tmp_dir, ENGINE_FILE), **engine.to_arrays())
+
+    created_at = datetime.utcnow()
+    version = f"{created_at:%Y%m%dT%H%M%SZ}-{file_hash(model_path)[:8]}"
+    manifest = {
+        'format': ARTIFACT_FORMAT,
+        'version': version,
+        'created_at': created_at.isoformat() + 'Z',
+        'model_name': model_name,
+        'model_class': type(model).__name__,
+        'model_format': model_format,
+        'model_file': model_file,
+        'engine_file': ENGINE_FILE if engine is not None else None,
+        'feature_names': list(feature_names),
+        'feature_pipeline': feature_pipeline.to_dict() if feature_pipeline is not None else None,
+        'training_data_hash': training_data_hash,
+        'holdout': holdout,
+        'parent_version': parent_version,
+        'label_watermark': label_watermark.isoformat() if label_watermark is not None else None,
+        'metrics': metrics or {},
+        'library_versions': library_versions(),
+    }
+    with open(os.path.join(tmp_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2, default=float)
+
+    version_dir = os.path.join(root, version)
+    if os.path.isdir(version_dir):
+        # Same model bytes published within the same second
+        shutil.rmtree(tmp_dir)
+    else:
+        os.replace(tmp_dir, version_dir)
+    current_tmp = os.path.join(root, f'.{CURRENT_FILE}.tmp')
+    with open(current_tmp, 'w') as f:
+        f.write(version + '\n')
+    os.replace(current_tmp, os.path.join(root, CURRENT_FILE))
+    return version_dir
+
+
+class ModelArtifact:
+    """Read side of an artifact version; the estimator is loaded on first use."""
+
+    def __init__(self, path):
+        self.path = resolve_version_dir(path)
+        with open(os.path.join(self.path, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        if self.manifest.get('format') != ARTIFACT_FORMAT:
+            raise ValueError(f"Unsupported artifact format: {self.manifest.get('format')}")
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def version(self):
+        return self.manifest['version']
+
+    @property
+    def model_name(self):
+        return self.manifest['model_name']
+
+    @property
+    def feature_names(self):
+        return self.manifest['feature_names']
+
+    @property
+    def label_watermark(self):
+        """``labelled_at`` of the newest labelled patient this version was trained on."""
+        watermark = self.manifest.get('label_watermark')
+        return datetime.fromisoformat(watermark) if watermark else None
+
+    def load_scaler_stats(self):
+        with np.load(os.path.join(self.path, SCALER_FILE)) as data:
+            return ScalerStats(data['mean'], data['scale'])
+
+    def load_feature_pipeline(self):
+        """The stored FeaturePipeline; versions saved without one impute nothing."""
+        from models.features import FeaturePipeline
+        return FeaturePipeline.from_dict(self.manifest.get('feature_pipeline') or {})
+
+    def load_engine(self):
+        """The stored TreeEnsembleEngine, or None if the artifact has none."""
+        if not self.manifest.get('engine_file'):
+            return None
+        from models.tree_engine import TreeEnsembleEngine
+        with np.load(os.path.join(self.path, self.manifest['engine_file'])) as data:
+            return TreeEnsembleEngine.from_arrays(data)
+
+    def load_scaler(self):
+        from sklearn.preprocessing import StandardScaler
+        with np.load(os.path.join(self.path, SCALER_FILE)) as data:
+            scaler = StandardScaler()
+            scaler.mean_ = data['mean']
+            scaler.scale_ = data['scale']
+            scaler.var_ = data['var']
+            scaler.n_samples_seen_ = data['n_samples_seen'][()]
+        scaler.n_features_in_ = len(scaler.mean_)
+        scaler.feature_names_in_ = np.asarray(self.feature_names, dtype=object)
+        return scaler
+
+    def load_model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._read_model()
+        return self._model
+
+    def _read_model(self):
+        model_path = os.path.join(self.path, self.manifest['model_file'])
+        if self.manifest['model_format'] == 'xgboost-ubj':
+            import xgboost as xgb
+            model = xgb.XGBClassifier()
+            model.load_model(model_path)
+            return model
+        import joblib
+        return joblib.load(model_path, mmap_mode='r')
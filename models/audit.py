@@ -0,0 +1,19 @@
+from datetime import datetime
+
+from flask import has_request_context, request
+
+from utils.write_behind import write_behind
+
+
+def audit_event(event, user_id=None, **details):
+    """Record an audit event (login, logout, patient added, ...) without waiting on Mongo."""
+    doc = {
+        'event': event,
+        'user_id': user_id,
+        'details': details,
+        'created_at': datetime.utcnow(),
+    }
+    if has_request_context():
+        doc['ip'] = request.remote_addr
+        doc['path'] = request.path
+    write_behind.insert('audit_events', doc)
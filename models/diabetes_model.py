@@ -1,58 +1,161 @@
+import os
+import shutil
+import sys
+import tempfile
+
+if __name__ == "__main__" and not __package__:
+    # Allow `python models/diabetes_model.py` as well as `python -m models.diabetes_model`
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.neighbors import KNeighborsClassifier
 from sklearn.metrics import (
     accuracy_score, precision_score, recall_score, f1_score,
     confusion_matrix
 )
 from sklearn.preprocessing import StandardScaler
-import pickle
-import os
 import xgboost as xgb
+from concurrent.futures import ProcessPoolExecutor
+from models.serving import ServingPredictor
+from models.features import RAW_FEATURES, FeaturePipeline
+from models.incremental import ChunkedDataset, ChunkIter, StreamingMetrics
+from models.search import HyperparameterSearch, THREAD_PARAMS, DEFAULT_CACHE_DIR
+from models.artifact import save_artifact, file_hash
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'diabetes.csv')
+# Rows parsed per chunk while streaming the training CSV
+DATA_CHUNK_SIZE = int(os.getenv('TRAIN_CHUNK_SIZE', 100000))
+
+
+def evaluate_model(model, X_train, X_test, y_train, y_test, model_name):
+    """Fit one candidate and compute its train/test metrics.
+
+    Module-level so it can run in a worker process.
+    """
+    try:
+        model.fit(X_train, y_train)
+        y_train_pred = model.predict(X_train)
+        y_test_pred = model.predict(X_test)
+        train_metrics = {
+            'accuracy': accuracy_score(y_train, y_train_pred),
+            'precision': precision_score(y_train, y_train_pred),
+            'recall': recall_score(y_train, y_train_pred),
+            'f1': f1_score(y_train, y_train_pred)
+        }
+        test_metrics = {
+            'accuracy': accuracy_score(y_test, y_test_pred),
+            'precision': precision_score(y_test, y_test_pred),
+            'recall': recall_score(y_test, y_test_pred),
+            'f1': f1_score(y_test, y_test_pred)
+        }
+        train_cm = confusion_matrix(y_train, y_train_pred)
+        test_cm = confusion_matrix(y_test, y_test_pred)
+        return {
+            'model': model,
+            'train_metrics': train_metrics,
+            'test_metrics': test_metrics,
+            'train_cm': train_cm,
+            'test_cm': test_cm,
+            'train_pred': y_train_pred,
+            'test_pred': y_test_pred
+        }
+    except Exception as e:
+        raise Exception(f"Error in evaluate_model ({model_name}): {e}")
+
+
+def print_results(model_name, results):
+    print(f"\n{model_name} Results:")
+    print("-" * 50)
+    print("TRAINING SET:")
+    print(f"  Accuracy:  {results['train_metrics']['accuracy']:.4f}")
+    print(f"  Precision: {results['train_metrics']['precision']:.4f}")
+    print(f"  Recall:    {results['train_metrics']['recall']:.4f}")
+    print(f"  F1 Score:  {results['train_metrics']['f1']:.4f}")
+    print("\nTEST SET:")
+    print(f"  Accuracy:  {results['test_metrics']['accuracy']:.4f}")
+    print(f"  Precision: {results['test_metrics']['precision']:.4f}")
+    print(f"  Recall:    {results['test_metrics']['recall']:.4f}")
+    print(f"  F1 Score:  {results['test_metrics']['f1']:.4f}")
+    print("\nConfusion Matrix (Test):")
+    print(results['test_cm'])
 
 
-class DiabetesPredictor:
-    def __init__(self):
+def print_summary(model_results):
+    summary_df = pd.DataFrame([
+        {
+            'Model': name,
+            'Train_Accuracy': f"{res['train_metrics']['accuracy']:.4f}",
+            'Test_Accuracy': f"{res['test_metrics']['accuracy']:.4f}",
+            'Train_F1': f"{res['train_metrics']['f1']:.4f}",
+            'Test_F1': f"{res['test_metrics']['f1']:.4f}",
+            'Train_Precision': f"{res['train_metrics']['precision']:.4f}",
+            'Test_Precision': f"{res['test_metrics']['precision']:.4f}",
+            'Train_Recall': f"{res['train_metrics']['recall']:.4f}",
+            'Test_Recall': f"{res['test_metrics']['recall']:.4f}"
+        } for name, res in model_results.items()
+    ])
+    print("\n" + "=" * 80)
+    print("MODEL COMPARISON SUMMARY")
+    print("=" * 80)
+    print(summary_df.to_string(index=False))
+
+
+class DiabetesPredictor(ServingPredictor):
+    """Trains and compares the candidate models; serving is inherited."""
+
+    def __init__(self, build_models=True, n_workers=None):
+        super().__init__()
         try:
-            self.models = {
-                'RandomForest': RandomForestClassifier(n_estimators=100, random_state=42),
-                'LogisticRegression': LogisticRegression(random_state=42, max_iter=1000),
-                'KNN': KNeighborsClassifier(n_neighbors=5),
-                'XGBoost': xgb.XGBClassifier(random_state=42, eval_metric='logloss')
-            }
-            self.best_model = None
-            self.best_model_name = None
+            # Serving instances only load a fitted model, so they skip
+            # constructing the candidate estimators.
+            self.models = {}
+            if build_models:
+                self.models = {
+                    'RandomForest': RandomForestClassifier(n_estimators=100, random_state=42),
+                    'LogisticRegression': LogisticRegression(random_state=42, max_iter=1000),
+                    'KNN': KNeighborsClassifier(n_neighbors=5),
+                    'XGBoost': xgb.XGBClassifier(random_state=42, eval_metric='logloss')
+                }
             self.scaler = StandardScaler()
-            self.feature_names = [
-                'Glucose', 'BloodPressure', 'SkinThickness',
-                'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age',
-                'Glucose_BMI', 'Age_DPF', 'High_Glucose',
-                'BMI_Underweight', 'BMI_Healthy', 'BMI_Overweight', 'BMI_Obese'
-            ]
-            self.is_trained = False
             self.model_results = {}
+            # How the training data was split into train and test rows;
+            # stored in the artifact for models/model_update.py
+            self.holdout = None
+            # Candidates fitted concurrently; TRAIN_WORKERS=1 trains serially
+            if n_workers is None:
+                n_workers = int(os.getenv('TRAIN_WORKERS', 0)) or min(len(self.models), os.cpu_count() or 1)
+            self.n_workers = max(1, n_workers)
         except Exception as e:
             raise Exception(f"Error in __init__: {e}")
 
-    def load_data(self):
+    def iter_data(self, data_path, chunksize=DATA_CHUNK_SIZE):
+        """Read the training CSV in chunks of ``chunksize`` rows."""
+        return pd.read_csv(data_path, chunksize=chunksize)
+
+    def load_data(self, data_path=DEFAULT_DATA_PATH, chunksize=DATA_CHUNK_SIZE):
+        """Fit the feature pipeline and build the training frame, streaming the CSV.
+
+        The first pass fits the imputation medians and hashes the file; the
+        second imputes and engineers each chunk, so only the final float
+        matrix is ever held in memory, not the parsed CSV.
+        """
         try:
-            data_path = os.path.join(os.path.dirname(__file__), '..', 'data', 'diabetes.csv')
-            df = pd.read_csv(data_path)
-            invalid_zero_cols = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
-            for col in invalid_zero_cols:
-                median_val = df.loc[df[col] > 0, col].median()
-                df[col] = df[col].replace(0, median_val)
-            df['Glucose_BMI'] = df['Glucose'] * df['BMI']
-            df['Age_DPF'] = df['Age'] * df['DiabetesPedigreeFunction']
-            df['High_Glucose'] = (df['Glucose'] > 140).astype(int)
-            df['BMI_Underweight'] = (df['BMI'] < 18.5).astype(int)
-            df['BMI_Healthy']     = ((df['BMI'] >= 18.5) & (df['BMI'] < 25)).astype(int)
-            df['BMI_Overweight']  = ((df['BMI'] >= 25) & (df['BMI'] < 30)).astype(int)
-            df['BMI_Obese']       = (df['BMI'] >= 30).astype(int)
+            self.training_data_hash = file_hash(data_path)
+            self.feature_pipeline = FeaturePipeline().fit(
+                chunk[RAW_FEATURES] for chunk in self.iter_data(data_path, chunksize)
+            )
+            features, outcomes = [], []
+            for chunk in self.iter_data(data_path, chunksize):
+                features.append(self.feature_pipeline.transform(chunk[RAW_FEATURES]))
+                outcomes.append(chunk['Outcome'].to_numpy())
+            df = pd.DataFrame(np.concatenate(features), columns=self.feature_pipeline.feature_names)
+            df['Outcome'] = np.concatenate(outcomes)
             print("Dataset loaded, cleaned, and features engineered!")
+            print(f"Imputed zero medians: {self.feature_pipeline.medians}")
             print(f"Shape: {df.shape}")
             return df
         except Exception as e:
@@ -62,8 +165,10 @@ class DiabetesPredictor:
         try:
             X = df.drop('Outcome', axis=1)
             y = df['Outcome']
+            self.holdout = {'method': 'train_test_split', 'test_size': 0.2, 'random_state': 42, 'stratify': True}
             X_train, X_test, y_train, y_test = train_test_split(
-                X, y, test_size=0.2, random_state=42, stratify=y
+                X, y, test_size=self.holdout['test_size'], random_state=self.holdout['random_state'],
+                stratify=y
             )
             self.scaler.fit(X_train)
             X_train_scaled = self.scaler.transform(X_train)
@@ -74,84 +179,79 @@ class DiabetesPredictor:
             raise Exception(f"Error in prepare_data: {e}")
 
     def evaluate_model(self, model, X_train, X_test, y_train, y_test, model_name):
+        return evaluate_model(model, X_train, X_test, y_train, y_test, model_name)
+
+    def fit_candidates(self, X_train, X_test, y_train, y_test):
+        """Fit and evaluate every entry of self.models, in parallel processes.
+
+        Cores are split between the workers so that each estimator's own
+        threading does not oversubscribe the machine. Returns results keyed
+        by model name in self.models order.
+        """
         try:
-            model.fit(X_train, y_train)
-            y_train_pred = model.predict(X_train)
-            y_test_pred = model.predict(X_test)
-            train_metrics = {
-                'accuracy': accuracy_score(y_train, y_train_pred),
-                'precision': precision_score(y_train, y_train_pred),
-                'recall': recall_score(y_train, y_train_pred),
-                'f1': f1_score(y_train, y_train_pred)
-            }
-            test_metrics = {
-                'accuracy': accuracy_score(y_test, y_test_pred),
-                'precision': precision_score(y_test, y_test_pred),
-                'recall': recall_score(y_test, y_test_pred),
-                'f1': f1_score(y_test, y_test_pred)
-            }
-            train_cm = confusion_matrix(y_train, y_train_pred)
-            test_cm = confusion_matrix(y_test, y_test_pred)
-            return {
-                'model': model,
-                'train_metrics': train_metrics,
-                'test_metrics': test_metrics,
-                'train_cm': train_cm,
-                'test_cm': test_cm,
-                'train_pred': y_train_pred,
-                'test_pred': y_test_pred
-            }
+            workers = min(self.n_workers, len(self.models))
+            threads = max(1, (os.cpu_count() or 1) // workers)
+            for model in self.models.values():
+                thread_param = THREAD_PARAMS.get(type(model).__name__)
+                if thread_param:
+                    model.set_params(**{thread_param: threads})
+            if workers == 1:
+                return {
+                    name: evaluate_model(model, X_train, X_test, y_train, y_test, name)
+                    for name, model in self.models.items()
+                }
+            print(f"Fitting {len(self.models)} models on {workers} workers x {threads} threads")
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {
+                    name: pool.submit(evaluate_model, model, X_train, X_test, y_train, y_test, name)
+                    for name, model in self.models.items()
+                }
+                return {name: future.result() for name, future in futures.items()}
         except Exception as e:
-            raise Exception(f"Error in evaluate_model ({model_name}): {e}")
+            raise Exception(f"Error in fit_candidates: {e}")
 
-    def train_model(self):
+    def train_model(self, search=None, data_path=DEFAULT_DATA_PATH, chunksize=DATA_CHUNK_SIZE):
+        """Train every candidate and keep the best one.
+
+        Without ``search`` the candidates keep their default hyperparameters
+        and the winner is picked on test F1. With a HyperparameterSearch,
+        each candidate is tuned by cross-validation on the training split
+        first and the winner is picked on CV F1, leaving the test split for
+        reporting only.
+        """
         try:
             print("Starting training and model comparison...")
-            df = self.load_data()
+            df = self.load_data(data_path, chunksize)
             X_train, X_test, y_train, y_test = self.prepare_data(df)
             self.model_results = {}
+            self.search_results = {}
+            if search is not None:
+                self.search_results = search.search(self.models, X_train, y_train)
+                for model_name, found in self.search_results.items():
+                    self.models[model_name].set_params(**found['best_params'])
             best_f1 = 0
-            for model_name, model in self.models.items():
-                print(f"\nTraining {model_name}...")
-                results = self.evaluate_model(model, X_train, X_test, y_train, y_test, model_name)
+            best_score = 0
+            candidate_results = self.fit_candidates(X_train, X_test, y_train, y_test)
+            for model_name, results in candidate_results.items():
+                # Fitted copies come back from the worker processes
+                model = results['model']
+                self.models[model_name] = model
                 self.model_results[model_name] = results
-                print(f"\n{model_name} Results:")
-                print("-" * 50)
-                print("TRAINING SET:")
-                print(f"  Accuracy:  {results['train_metrics']['accuracy']:.4f}")
-                print(f"  Precision: {results['train_metrics']['precision']:.4f}")
-                print(f"  Recall:    {results['train_metrics']['recall']:.4f}")
-                print(f"  F1 Score:  {results['train_metrics']['f1']:.4f}")
-                print("\nTEST SET:")
-                print(f"  Accuracy:  {results['test_metrics']['accuracy']:.4f}")
-                print(f"  Precision: {results['test_metrics']['precision']:.4f}")
-                print(f"  Recall:    {results['test_metrics']['recall']:.4f}")
-                print(f"  F1 Score:  {results['test_metrics']['f1']:.4f}")
-                print("\nConfusion Matrix (Test):")
-                print(results['test_cm'])
-                if results['test_metrics']['f1'] > best_f1:
+                print_results(model_name, results)
+                if self.search_results:
+                    score = self.search_results[model_name]['best_score']
+                else:
+                    score = results['test_metrics']['f1']
+                if score > best_score:
+                    best_score = score
                     best_f1 = results['test_metrics']['f1']
                     self.best_model = model
                     self.best_model_name = model_name
-            summary_df = pd.DataFrame([
-                {
-                    'Model': name,
-                    'Train_Accuracy': f"{res['train_metrics']['accuracy']:.4f}",
-                    'Test_Accuracy': f"{res['test_metrics']['accuracy']:.4f}",
-                    'Train_F1': f"{res['train_metrics']['f1']:.4f}",
-                    'Test_F1': f"{res['test_metrics']['f1']:.4f}",
-                    'Train_Precision': f"{res['train_metrics']['precision']:.4f}",
-                    'Test_Precision': f"{res['test_metrics']['precision']:.4f}",
-                    'Train_Recall': f"{res['train_metrics']['recall']:.4f}",
-                    'Test_Recall': f"{res['test_metrics']['recall']:.4f}"
-                } for name, res in self.model_results.items()
-            ])
-            print("\n" + "=" * 80)
-            print("MODEL COMPARISON SUMMARY")
-            print("=" * 80)
-            print(summary_df.to_string(index=False))
-            print(f"\n🏆 BEST MODEL: {self.best_model_name} (Test F1 Score: {best_f1:.4f})")
-            self.model = self.best_model
+            print_summary(self.model_results)
+            if self.search_results:
+                print(f"\n🏆 BEST MODEL: {self.best_model_name} (CV F1 Score: {best_score:.4f}, Test F1 Score: {best_f1:.4f})")
+            else:
+                print(f"\n🏆 BEST MODEL: {self.best_model_name} (Test F1 Score: {best_f1:.4f})")
             if hasattr(self.best_model, 'feature_importances_'):
                 fi = pd.DataFrame({
                     'feature': self.feature_names,
@@ -164,72 +264,139 @@ class DiabetesPredictor:
         except Exception as e:
             raise Exception(f"Error in train_model: {e}")
 
-    def save_model(self):
-        try:
-            if not self.is_trained:
-                raise Exception("Model not trained yet!")
-            model_data = {
-                'model': self.best_model,
-                'scaler': self.scaler,
-                'model_name': self.best_model_name,
-                'feature_names': self.feature_names
-            }
-            model_path = os.path.join(os.path.dirname(__file__), 'diabetes_model.pkl')
-            with open(model_path, 'wb') as f:
-                pickle.dump(model_data, f)
-            print(f"Best model ({self.best_model_name}) and scaler saved to {model_path}")
-            return True
-        except Exception as e:
-            raise Exception(f"Error in save_model: {e}")
+    def train_incremental(self, data_path=DEFAULT_DATA_PATH, chunksize=DATA_CHUNK_SIZE, epochs=5,
+                          external_memory=False):
+        """Train incremental learners without loading the dataset into memory.
 
-    def load_model(self):
+        Every step streams the CSV in ``chunksize`` rows (see
+        models/incremental.py). The candidates are an SGD logistic
+        regression, ``epochs`` passes of partial_fit, and XGBoost built from
+        a chunk iterator (pages cached on disk with ``external_memory``).
+        The winner is picked on test F1.
+        """
         try:
-            model_path = os.path.join(os.path.dirname(__file__), 'diabetes_model.pkl')
-            with open(model_path, 'rb') as f:
-                saved_data = pickle.load(f)
-                self.best_model = saved_data['model']
-                self.model = self.best_model
-                self.scaler = saved_data['scaler']
-                self.best_model_name = saved_data.get('model_name', 'Unknown')
-                self.feature_names = saved_data.get('feature_names', self.feature_names)
+            print("Starting out-of-core training...")
+            dataset = ChunkedDataset(data_path, chunksize)
+            self.training_data_hash = file_hash(data_path)
+            self.holdout = {'method': 'chunk_mask', 'chunksize': chunksize,
+                            'test_size': dataset.test_size, 'seed': dataset.seed}
+            self.feature_pipeline = dataset.fit_features()
+            print(f"Imputed zero medians: {self.feature_pipeline.medians}")
+            self.scaler = dataset.fit_scaler()
+            print(f"Training samples: {self.scaler.n_samples_seen_}")
+
+            sgd = SGDClassifier(loss='log_loss', random_state=42)
+            rng = np.random.default_rng(42)
+            for epoch in range(epochs):
+                for X, y in dataset.chunks('train'):
+                    order = rng.permutation(len(y))
+                    sgd.partial_fit(X[order], y[order], classes=[0, 1])
+                print(f"SGD epoch {epoch + 1}/{epochs} done")
+
+            template = xgb.XGBClassifier(random_state=42, eval_metric='logloss')
+            cache_dir = tempfile.mkdtemp(prefix='xgb-cache-') if external_memory else None
+            try:
+                if external_memory:
+                    dtrain = xgb.DMatrix(ChunkIter(dataset, cache_prefix=os.path.join(cache_dir, 'train')))
+                else:
+                    dtrain = xgb.QuantileDMatrix(ChunkIter(dataset))
+                booster = xgb.train(template.get_xgb_params(), dtrain,
+                                    num_boost_round=template.n_estimators or 100)
+                # Freeing the DMatrix removes its cache pages
+                del dtrain
+            finally:
+                if cache_dir:
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+            booster_model = xgb.XGBClassifier()
+            booster_model.load_model(booster.save_raw('ubj'))
+
+            self.models = {'SGDLogisticRegression': sgd, 'XGBoost': booster_model}
+            metrics = {name: (StreamingMetrics(), StreamingMetrics()) for name in self.models}
+            for X, y, is_test in dataset.labelled_chunks():
+                for name, model in self.models.items():
+                    y_pred = model.predict(X)
+                    train_metrics, test_metrics = metrics[name]
+                    train_metrics.update(y[~is_test], y_pred[~is_test])
+                    test_metrics.update(y[is_test], y_pred[is_test])
+
+            self.model_results = {}
+            best_f1 = -1
+            for name, (train_metrics, test_metrics) in metrics.items():
+                results = {
+                    'model': self.models[name],
+                    'train_metrics': train_metrics.metrics(),
+                    'test_metrics': test_metrics.metrics(),
+                    'train_cm': train_metrics.cm,
+                    'test_cm': test_metrics.cm,
+                }
+                self.model_results[name] = results
+                print_results(name, results)
+                if results['test_metrics']['f1'] > best_f1:
+                    best_f1 = results['test_metrics']['f1']
+                    self.best_model = self.models[name]
+                    self.best_model_name = name
+            print_summary(self.model_results)
+            print(f"\n🏆 BEST MODEL: {self.best_model_name} (Test F1 Score: {best_f1:.4f})")
             self.is_trained = True
-            print(f"Model ({self.best_model_name}) and scaler loaded successfully!")
             return True
         except Exception as e:
-            raise Exception(f"Error in load_model: {e}")
+            raise Exception(f"Error in train_incremental: {e}")
 
-    def predict(self, input_data):
+    def save_model(self, artifact_root=None):
+        """Publish the best model as a new artifact version (see models/artifact.py)."""
         try:
             if not self.is_trained:
                 raise Exception("Model not trained yet!")
-            base = list(input_data)
-            engineered = [
-                base[0] * base[4],
-                base[6] * base[5],
-                int(base[0] > 140),
-                int(base[4] < 18.5),
-                int(18.5 <= base[4] < 25),
-                int(25 <= base[4] < 30),
-                int(base[4] >= 30)
-            ]
-            full_features = base + engineered
-            df = pd.DataFrame([full_features], columns=self.feature_names)
-            df_scaled = self.scaler.transform(df)
-            pred = self.best_model.predict(df_scaled)[0]
-            probs = self.best_model.predict_proba(df_scaled)[0]
-            return {
-                'prediction': 'High Risk' if pred == 1 else 'Low Risk',
-                'risk_percentage': round(probs[1] * 100, 2),
-                'confidence': round(max(probs) * 100, 2),
-                'model_used': self.best_model_name
-            }
+            results = self.model_results.get(self.best_model_name, {})
+            kwargs = {'root': artifact_root} if artifact_root else {}
+            version_dir = save_artifact(
+                self.best_model, self.best_model_name, self.scaler, self.feature_names,
+                training_data_hash=self.training_data_hash,
+                holdout=self.holdout,
+                metrics=results.get('test_metrics'),
+                # Already checked against the model when the pipeline was built
+                engine=self.pipeline.engine,
+                feature_pipeline=self.feature_pipeline,
+                **kwargs
+            )
+            print(f"Best model ({self.best_model_name}) and scaler saved to {version_dir}")
+            return True
         except Exception as e:
-            raise Exception(f"Error in predict: {e}")
+            raise Exception(f"Error in save_model: {e}")
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Train and compare diabetes risk models.")
+    parser.add_argument("--search", choices=["grid", "random", "halving"],
+                        help="tune each model with cross-validated hyperparameter search")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--n-iter", type=int, default=20,
+                        help="candidates per model for random/halving search")
+    parser.add_argument("--no-search-cache", action="store_true")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="training CSV")
+    parser.add_argument("--incremental", action="store_true",
+                        help="out-of-core training: stream the CSV in chunks (SGD and XGBoost only)")
+    parser.add_argument("--chunk-size", type=int, default=DATA_CHUNK_SIZE)
+    parser.add_argument("--epochs", type=int, default=5, help="SGD passes over the data (--incremental)")
+    parser.add_argument("--external-memory", action="store_true",
+                        help="keep XGBoost's training pages on disk (--incremental)")
+    args = parser.parse_args()
+    if args.incremental and args.search:
+        parser.error("--search cannot be combined with --incremental")
+
+    search = None
+    if args.search:
+        search = HyperparameterSearch(
+            strategy=args.search, n_folds=args.folds, n_iter=args.n_iter,
+            cache_dir=None if args.no_search_cache else DEFAULT_CACHE_DIR
+        )
     predictor = DiabetesPredictor()
-    if predictor.train_model():
+    if args.incremental:
+        trained = predictor.train_incremental(args.data, args.chunk_size, args.epochs, args.external_memory)
+    else:
+        trained = predictor.train_model(search=search, data_path=args.data, chunksize=args.chunk_size)
+    if trained:
         predictor.save_model()
         print("\n" + "="*50)
         print("TESTING BEST MODEL")
@@ -0,0 +1,163 @@
+import numpy as np
+
+# Keys used by the HTML forms and stored on patient documents, in model order
+INPUT_FIELDS = [
+    'glucose', 'blood_pressure', 'skin_thickness', 'insulin',
+    'bmi', 'diabetes_pedigree', 'age'
+]
+RAW_FEATURES = [
+    'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+
+# Declarative description of the model features. FeaturePipeline evaluates
+# it and is stored, spec and fitted medians, in each model artifact.
+#   impute_zero_median  inputs where 0 means "not measured"; zeros are
+#                       replaced by the median of the positive values
+#   derived             [name, op, args] evaluated in order on the imputed
+#                       inputs: product [a, b] -> a * b, greater [a, t] ->
+#                       a > t, range [a, lo, hi] -> lo <= a < hi (None = open)
+FEATURE_SPEC = {
+    'impute_zero_median': ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI'],
+    'derived': [
+        ['Glucose_BMI', 'product', ['Glucose', 'BMI']],
+        ['Age_DPF', 'product', ['Age', 'DiabetesPedigreeFunction']],
+        ['High_Glucose', 'greater', ['Glucose', 140]],
+        ['BMI_Underweight', 'range', ['BMI', None, 18.5]],
+        ['BMI_Healthy', 'range', ['BMI', 18.5, 25]],
+        ['BMI_Overweight', 'range', ['BMI', 25, 30]],
+        ['BMI_Obese', 'range', ['BMI', 30, None]],
+    ],
+}
+ENGINEERED_FEATURES = [name for name, _, _ in FEATURE_SPEC['derived']]
+FEATURE_NAMES = RAW_FEATURES + ENGINEERED_FEATURES
+
+
+def as_raw_matrix(data):
+    """Coerce a (N, 7) array, list of rows or DataFrame into a float matrix.
+
+    DataFrames may use either the dataset column names or the form field
+    names; columns are reordered to the model input order. Frames with
+    neither set of names are taken positionally.
+    """
+    if hasattr(data, 'columns'):
+        for cols in (RAW_FEATURES, INPUT_FIELDS):
+            if set(cols) <= set(data.columns):
+                data = data[cols]
+                break
+        data = data.to_numpy()
+    X = np.asarray(data, dtype=np.float64)
+    if X.ndim == 1:
+        X = X.reshape(1, -1)
+    if X.ndim != 2 or X.shape[1] != len(RAW_FEATURES):
+        raise ValueError(f"Expected {len(RAW_FEATURES)} input features, got shape {X.shape}")
+    return X
+
+
+class FeaturePipeline:
+    """Raw inputs to the model feature matrix, following a FEATURE_SPEC.
+
+    Imputation medians are fitted in one pass over any number of chunks:
+    ``partial_fit`` keeps the distinct positive values of each imputed
+    column with their counts, which is exact and stays small for clinical
+    measurements, and ``finish_fit`` takes the medians from them. Before
+    fitting (or for artifacts saved without a pipeline) no values are
+    imputed.
+    """
+
+    def __init__(self, spec=None, medians=None):
+        self.spec = spec or FEATURE_SPEC
+        self.medians = dict(medians or {})
+        self.feature_names = RAW_FEATURES + [name for name, _, _ in self.spec['derived']]
+        self._counts = {}
+        self._derived = [(name, op, args) for name, op, args in self.spec['derived']]
+        for _, op, _ in self._derived:
+            if op not in ('product', 'greater', 'range'):
+                raise ValueError(f"Unknown feature operation: {op}")
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    # -----------------------
+    # Fitting
+    # -----------------------
+    def partial_fit(self, data):
+        """Accumulate value counts for the imputed columns of one chunk."""
+        X = as_raw_matrix(data)
+        for name in self.spec['impute_zero_median']:
+            column = X[:, RAW_FEATURES.index(name)]
+            values, counts = np.unique(column[column > 0], return_counts=True)
+            if name in self._counts:
+                seen_values, seen_counts = self._counts[name]
+                values, inverse = np.unique(np.concatenate([seen_values, values]), return_inverse=True)
+                counts = np.bincount(inverse, weights=np.concatenate([seen_counts, counts])).astype(np.int64)
+            self._counts[name] = (values, counts)
+        return self
+
+    def finish_fit(self):
+        """Set the medians from the accumulated counts and drop the counts."""
+        self.medians = {}
+        for name in self.spec['impute_zero_median']:
+            values, counts = self._counts.get(name, (np.empty(0), np.empty(0, dtype=np.int64)))
+            if not len(values):
+                continue
+            cumulative = np.cumsum(counts)
+            n = int(cumulative[-1])
+            lower = values[np.searchsorted(cumulative, (n - 1) // 2, side='right')]
+            upper = values[np.searchsorted(cumulative, n // 2, side='right')]
+            # Same arithmetic as pandas/NumPy median (both equal for odd n)
+            self.medians[name] = float((lower + upper) / 2)
+        self._counts = {}
+        return self
+
+    def fit(self, chunks):
+        """Fit on an iterable of chunks (arrays or DataFrames of raw inputs)."""
+        self._counts = {}
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self.finish_fit()
+
+    # -----------------------
+    # Transform
+    # -----------------------
+    def transform(self, data, out=None):
+        """Return the (N, n_features) feature matrix for raw inputs.
+
+        ``out`` may be a preallocated float64 array of that shape to fill.
+        """
+        X = as_raw_matrix(data)
+        if out is None:
+            out = np.empty((X.shape[0], self.n_features), dtype=np.float64)
+        n_raw = len(RAW_FEATURES)
+        out[:, :n_raw] = X
+        for name, median in self.medians.items():
+            column = out[:, RAW_FEATURES.index(name)]
+            np.copyto(column, median, where=column == 0)
+        columns = dict(zip(RAW_FEATURES, out[:, :n_raw].T))
+        for i, (name, op, args) in enumerate(self._derived, start=n_raw):
+            target = out[:, i]
+            if op == 'product':
+                np.multiply(columns[args[0]], columns[args[1]], out=target)
+            elif op == 'greater':
+                target[:] = columns[args[0]] > args[1]
+            else:
+                column, lo, hi = columns[args[0]], args[1], args[2]
+                if lo is None:
+                    target[:] = column < hi
+                elif hi is None:
+                    target[:] = column >= lo
+                else:
+                    target[:] = (column >= lo) & (column < hi)
+            columns[name] = target
+        return out
+
+    # -----------------------
+    # Serialization
+    # -----------------------
+    def to_dict(self):
+        return {'spec': self.spec, 'medians': self.medians}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(spec=data.get('spec'), medians=data.get('medians'))
@@ -0,0 +1,118 @@
+"""Out-of-core training helpers: every pass streams the training CSV in chunks.
+
+Used by ``DiabetesPredictor.train_incremental`` (``python -m
+models.diabetes_model --incremental``). Apart from the models themselves,
+nothing larger than one chunk is held in memory:
+
+1. the FeaturePipeline medians are fitted (see models/features.py);
+2. the StandardScaler is fitted with partial_fit on the training rows;
+3. incremental learners are trained chunk by chunk (SGDClassifier.partial_fit,
+   or XGBoost reading the chunks through ChunkIter);
+4. train and test metrics are accumulated by StreamingMetrics.
+
+Each row goes to the test split by a draw seeded with the chunk number, so
+every pass sees the same split without it being stored.
+"""
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.preprocessing import StandardScaler
+
+from models.features import RAW_FEATURES, FeaturePipeline
+
+LABEL = 'Outcome'
+
+
+def test_mask(n_rows, chunk_no, test_size, seed):
+    """Rows of chunk ``chunk_no`` that belong to the test split."""
+    return np.random.default_rng([seed, chunk_no]).random(n_rows) < test_size
+
+
+class ChunkedDataset:
+    """The training CSV as a re-iterable stream of feature/label chunks."""
+
+    def __init__(self, data_path, chunksize, test_size=0.2, seed=42):
+        self.data_path = data_path
+        self.chunksize = chunksize
+        self.test_size = test_size
+        self.seed = seed
+        self.feature_pipeline = None
+        self.scaler = None
+
+    def raw_chunks(self):
+        return pd.read_csv(self.data_path, chunksize=self.chunksize)
+
+    def fit_features(self):
+        self.feature_pipeline = FeaturePipeline().fit(chunk[RAW_FEATURES] for chunk in self.raw_chunks())
+        return self.feature_pipeline
+
+    def fit_scaler(self):
+        self.scaler = StandardScaler()
+        for X, _ in self.chunks('train', scaled=False):
+            self.scaler.partial_fit(X)
+        return self.scaler
+
+    def labelled_chunks(self, scaled=True):
+        """Yield ``(X, y, is_test)`` for every chunk of the file."""
+        for chunk_no, chunk in enumerate(self.raw_chunks()):
+            X = self.feature_pipeline.transform(chunk[RAW_FEATURES])
+            if scaled:
+                X = self.scaler.transform(X)
+            y = chunk[LABEL].to_numpy()
+            yield X, y, test_mask(len(chunk), chunk_no, self.test_size, self.seed)
+
+    def chunks(self, split, scaled=True):
+        """Yield ``(X, y)`` for the rows of ``split`` ('train' or 'test')."""
+        for X, y, is_test in self.labelled_chunks(scaled):
+            keep = is_test if split == 'test' else ~is_test
+            if keep.any():
+                yield X[keep], y[keep]
+
+
+class ChunkIter(xgb.DataIter):
+    """Feeds the scaled training chunks of a ChunkedDataset to XGBoost.
+
+    With ``cache_prefix`` XGBoost keeps the pages in external memory on disk;
+    without it the chunks are quantized into a compact QuantileDMatrix.
+    """
+
+    def __init__(self, dataset, cache_prefix=None):
+        self.dataset = dataset
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data):
+        if self._chunks is None:
+            self._chunks = self.dataset.chunks('train')
+        try:
+            X, y = next(self._chunks)
+        except StopIteration:
+            return False
+        input_data(data=X, label=y)
+        return True
+
+    def reset(self):
+        self._chunks = None
+
+
+class StreamingMetrics:
+    """Binary classification metrics from a running confusion matrix."""
+
+    def __init__(self):
+        self.cm = np.zeros((2, 2), dtype=np.int64)
+
+    def update(self, y_true, y_pred):
+        codes = 2 * np.asarray(y_true, dtype=np.int64) + np.asarray(y_pred, dtype=np.int64)
+        self.cm += np.bincount(codes, minlength=4).reshape(2, 2)
+
+    def metrics(self):
+        (tn, fp), (fn, tp) = self.cm.tolist()
+        total = tn + fp + fn + tp
+        precision = tp / (tp + fp) if tp + fp else 0.0
+        recall = tp / (tp + fn) if tp + fn else 0.0
+        return {
+            'accuracy': (tp + tn) / total if total else 0.0,
+            'precision': precision,
+            'recall': recall,
+            'f1': 2 * precision * recall / (precision + recall) if precision + recall else 0.0,
+        }
@@ -0,0 +1,245 @@
+"""Warm-start model updates from newly labelled patients.
+
+Admins record a patient's confirmed ``outcome`` (0/1), which also sets
+``labelled_at``. ``update_model`` continues training the current artifact's
+estimator on the patients labelled after the artifact's ``label_watermark``,
+instead of retraining from scratch:
+
+- XGBoost: ``extra_rounds`` more boosting rounds on top of the booster;
+- RandomForest / ExtraTrees: ``extra_trees`` more trees (warm_start),
+  grown on the new rows;
+- SGDClassifier: partial_fit on the new rows;
+- LogisticRegression: a warm-started refit on the base training rows plus
+  the new rows (the fit is convex, so fitting the new rows alone would
+  simply forget the rest; the warm start only makes it converge faster).
+
+The artifact's feature pipeline and scaler are kept as they are, so inputs
+are prepared exactly as for the current model.
+
+Both models are scored on a held-out set: the test rows of the base
+dataset, found again from the split recorded in the artifact's ``holdout``,
+plus a seeded share of the new rows, which are not trained on. The base
+dataset must be the file the artifact was trained on (its
+``training_data_hash``), and it is streamed in chunks like
+models/incremental.py; only a LogisticRegression refit holds its prepared
+training rows in memory. The update is published as a new artifact version
+only if neither F1 nor accuracy drops by more than ``tolerance``. Every run
+is recorded in the ``model_updates`` collection.
+"""
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.model_selection import train_test_split
+
+from models.artifact import ModelArtifact, save_artifact, file_hash
+from models.diabetes_model import DATA_CHUNK_SIZE
+from models.features import INPUT_FIELDS, RAW_FEATURES
+from models.incremental import LABEL, StreamingMetrics, test_mask
+from models.pipeline import InferencePipeline
+
+DEFAULT_MIN_ROWS = 50
+DEFAULT_HOLDOUT_SIZE = 0.2
+DEFAULT_EXTRA_ROUNDS = 20
+DEFAULT_EXTRA_TREES = 20
+DEFAULT_TOLERANCE = 0.0
+
+# Metrics that must not drop for an update to be published
+GATED_METRICS = ('f1', 'accuracy')
+
+
+def labelled_patients(db, since=None):
+    """Raw inputs, outcomes and the newest ``labelled_at`` of patients labelled after ``since``."""
+    query = {'outcome': {'$in': [0, 1]}}
+    if since is not None:
+        query['labelled_at'] = {'$gt': since}
+    projection = {field: 1 for field in INPUT_FIELDS + ['outcome', 'labelled_at']}
+    rows, outcomes, watermark = [], [], since
+    for doc in db.patients.find(query, projection).sort('labelled_at', 1):
+        try:
+            rows.append([float(doc[field]) for field in INPUT_FIELDS])
+        except (KeyError, TypeError, ValueError):
+            continue
+        outcomes.append(int(doc['outcome']))
+        watermark = doc['labelled_at']
+    X = np.asarray(rows, dtype=np.float64).reshape(-1, len(INPUT_FIELDS))
+    return X, np.asarray(outcomes, dtype=np.int64), watermark
+
+
+def base_chunks(data_path, holdout, chunksize=DATA_CHUNK_SIZE):
+    """Yield ``(X_raw, y, is_test)`` chunks of the base dataset, split as recorded in ``holdout``.
+
+    A 'chunk_mask' split is redrawn chunk by chunk, as in ChunkedDataset; a
+    'train_test_split' split is recovered from the Outcome column alone, the
+    only column read whole.
+    """
+    method = holdout['method']
+    if method == 'chunk_mask':
+        chunksize = holdout['chunksize']
+    elif method == 'train_test_split':
+        outcomes = pd.read_csv(data_path, usecols=[LABEL])[LABEL].to_numpy()
+        # The split depends only on the row count and the labels
+        _, test_rows = train_test_split(
+            np.arange(len(outcomes)), test_size=holdout['test_size'],
+            random_state=holdout['random_state'], stratify=outcomes if holdout['stratify'] else None
+        )
+        is_test_rows = np.zeros(len(outcomes), dtype=bool)
+        is_test_rows[test_rows] = True
+    else:
+        raise ValueError(f"Unknown holdout method {method!r}")
+    start = 0
+    for chunk_no, chunk in enumerate(pd.read_csv(data_path, chunksize=chunksize)):
+        if method == 'chunk_mask':
+            is_test = test_mask(len(chunk), chunk_no, holdout['test_size'], holdout['seed'])
+        else:
+            is_test = is_test_rows[start:start + len(chunk)]
+        start += len(chunk)
+        yield chunk[RAW_FEATURES].to_numpy(dtype=np.float64), chunk[LABEL].to_numpy(), is_test
+
+
+def holdout_metrics(model, batches):
+    """StreamingMetrics of ``model`` over ``(X, y)`` batches."""
+    metrics = StreamingMetrics()
+    for X, y in batches:
+        metrics.update(y, model.predict(X))
+    return metrics
+
+
+def regressions(before, after, tolerance=DEFAULT_TOLERANCE):
+    """Names of GATED_METRICS that got worse by more than ``tolerance``."""
+    return [name for name in GATED_METRICS if after[name] < before[name] - tolerance]
+
+
+def warm_start(model, X, y, extra_rounds=DEFAULT_EXTRA_ROUNDS, extra_trees=DEFAULT_EXTRA_TREES,
+               base_X=None, base_y=None):
+    """Continue training ``model`` on scaled features ``X``; returns the updated model.
+
+    ``model`` itself may be modified. Raises ValueError for estimators that
+    cannot be updated incrementally (KNN: retrain instead).
+    """
+    kind = type(model).__name__
+    if kind == 'XGBClassifier':
+        updated = xgb.XGBClassifier(**model.get_params())
+        updated.set_params(n_estimators=extra_rounds)
+        updated.fit(X, y, xgb_model=model.get_booster())
+        return updated
+    if kind in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + extra_trees)
+        model.fit(X, y)
+        model.set_params(warm_start=False)
+        return model
+    if kind == 'SGDClassifier':
+        model.partial_fit(X, y)
+        return model
+    if kind == 'LogisticRegression':
+        model.set_params(warm_start=True)
+        model.fit(np.vstack([base_X, X]), np.concatenate([base_y, y]))
+        model.set_params(warm_start=False)
+        return model
+    raise ValueError(f"{kind} does not support warm-start updates; run a full retrain.")
+
+
+def update_model(db, artifact_root, data_path, min_rows=DEFAULT_MIN_ROWS,
+                 holdout_size=DEFAULT_HOLDOUT_SIZE, extra_rounds=DEFAULT_EXTRA_ROUNDS,
+                 extra_trees=DEFAULT_EXTRA_TREES, tolerance=DEFAULT_TOLERANCE, dry_run=False,
+                 chunksize=DATA_CHUNK_SIZE):
+    """Warm-start the current model on newly labelled patients and maybe publish it.
+
+    Returns a summary dict with the outcome in 'status': 'no_data' (fewer
+    than ``min_rows`` new labels), 'insufficient_classes' (the training rows
+    lack one of the model's classes, see 'reason'), 'rejected' (held-out
+    metrics regressed), 'dry_run' or 'published' (with the new 'version').
+    """
+    started_at = datetime.utcnow()
+    artifact = ModelArtifact(artifact_root)
+    watermark = artifact.label_watermark
+    X_new, y_new, new_watermark = labelled_patients(db, since=watermark)
+    summary = {
+        'started_at': started_at,
+        'base_version': artifact.version,
+        'model_name': artifact.model_name,
+        'since': watermark,
+        'labelled_rows': len(y_new),
+    }
+    if len(y_new) < min_rows:
+        summary.update(status='no_data', finished_at=datetime.utcnow())
+        db.model_updates.insert_one(dict(summary))
+        return summary
+
+    holdout = artifact.manifest.get('holdout')
+    training_data_hash = artifact.manifest.get('training_data_hash')
+    reason = None
+    if holdout is None:
+        reason = "The artifact does not record its train/test split; retrain it with models/diabetes_model.py"
+    elif file_hash(data_path) != training_data_hash:
+        reason = f"{data_path} is not the dataset the model was trained on"
+    if reason:
+        # Test rows could not be told from training rows
+        summary.update(status='rejected', reason=reason, finished_at=datetime.utcnow())
+        db.model_updates.insert_one(dict(summary))
+        return summary
+
+    feature_pipeline = artifact.load_feature_pipeline()
+    scaler = artifact.load_scaler()
+
+    def prepare(X_raw):
+        # Same arithmetic as StandardScaler.transform / InferencePipeline
+        return (feature_pipeline.transform(X_raw) - scaler.mean_) / scaler.scale_
+
+    is_holdout = np.random.default_rng(42).random(len(y_new)) < holdout_size
+    X_new_holdout, y_new_holdout = prepare(X_new[is_holdout]), y_new[is_holdout]
+    X_train, y_train = prepare(X_new[~is_holdout]), y_new[~is_holdout]
+
+    def holdout_batches():
+        for X_raw, y, is_test in base_chunks(data_path, holdout, chunksize):
+            if is_test.any():
+                yield prepare(X_raw[is_test]), y[is_test]
+        if len(y_new_holdout):
+            yield X_new_holdout, y_new_holdout
+
+    model = artifact.load_model()
+    missing = sorted(set(model.classes_.tolist()) - set(np.unique(y_train).tolist()))
+    if missing:
+        # Trees grown on one class cannot predict the other, and XGBoost
+        # refuses to fit at all; wait for more labels instead
+        summary.update(
+            status='insufficient_classes', trained_rows=len(y_train),
+            reason=f"No training rows labelled {', '.join(map(str, missing))}",
+            finished_at=datetime.utcnow(),
+        )
+        db.model_updates.insert_one(dict(summary))
+        return summary
+
+    before = holdout_metrics(model, holdout_batches())
+    base_X = base_y = None
+    if type(model).__name__ == 'LogisticRegression':
+        train_chunks = [(prepare(X_raw[~is_test]), y[~is_test])
+                        for X_raw, y, is_test in base_chunks(data_path, holdout, chunksize)]
+        base_X = np.vstack([X for X, _ in train_chunks])
+        base_y = np.concatenate([y for _, y in train_chunks])
+        del train_chunks
+    updated = warm_start(model, X_train, y_train, extra_rounds, extra_trees, base_X, base_y)
+    after = holdout_metrics(updated, holdout_batches())
+    regressed = regressions(before.metrics(), after.metrics(), tolerance)
+    summary.update(
+        trained_rows=len(y_train), holdout_rows=int(after.cm.sum()),
+        metrics_before=before.metrics(), metrics_after=after.metrics(), regressed=regressed,
+    )
+
+    if regressed:
+        summary['status'] = 'rejected'
+    elif dry_run:
+        summary['status'] = 'dry_run'
+    else:
+        pipeline = InferencePipeline(updated, scaler, feature_pipeline=feature_pipeline)
+        version_dir = save_artifact(
+            updated, artifact.model_name, scaler, artifact.feature_names, root=artifact_root,
+            training_data_hash=training_data_hash, holdout=holdout,
+            metrics=summary['metrics_after'], engine=pipeline.engine, feature_pipeline=feature_pipeline,
+            parent_version=artifact.version, label_watermark=new_watermark,
+        )
+        summary.update(status='published', version=ModelArtifact(version_dir).version)
+    summary['finished_at'] = datetime.utcnow()
+    db.model_updates.insert_one(dict(summary))
+    return summary
@@ -0,0 +1,225 @@
+"""Bulk patient import from CSV or Parquet uploads.
+
+Files are read in chunks of ``chunk_size`` rows (pandas for CSV, pyarrow
+record batches for Parquet), so memory stays flat however large the upload
+is. Each chunk is validated column-wise with the same rules as the admin
+"Add Patient" form, valid rows are written with one unordered insert_many
+and rejected rows are reported with their row number and reasons. With a
+predictor, valid rows are scored in the same pass and stored with the
+fields a scoring run would set.
+
+pandas (and pyarrow for Parquet) are imported on first use, so the web
+worker does not pay for them at startup.
+"""
+from datetime import datetime
+import logging
+import os
+import uuid
+
+import numpy as np
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+
+from models.features import INPUT_FIELDS, RAW_FEATURES
+from models.scoring import scored_fields
+
+logger = logging.getLogger(__name__)
+
+# Same rules as the admin "Add Patient" form
+NAME_PATTERN = r'[A-Za-z ]{3,}'
+PHONE_PATTERN = r'\d{10,15}'
+EMAIL_PATTERN = r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$'
+
+TEXT_FIELDS = ['name', 'phone', 'email']
+IMPORT_FIELDS = TEXT_FIELDS + INPUT_FIELDS
+
+# Header names are matched case-insensitively; the dataset column names
+# (Glucose, BloodPressure, ...) are accepted for the health fields
+COLUMN_ALIASES = {field: field for field in IMPORT_FIELDS}
+COLUMN_ALIASES.update({raw.lower(): field for raw, field in zip(RAW_FEATURES, INPUT_FIELDS)})
+
+FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet'}
+
+DEFAULT_CHUNK_SIZE = 5000
+DEFAULT_MAX_REJECTS = 1000
+
+
+class ImportFileError(ValueError):
+    """The upload as a whole cannot be imported (format, header, encoding).
+
+    Raised by import_patients after some chunks were already saved, it
+    carries the partial import summary in ``summary``.
+    """
+    summary = None
+
+
+def search_fields(name, email):
+    """Lowercased copies of name, its words and email; the dashboard searches these by prefix."""
+    return {'name_lc': name.lower(), 'name_words': name.lower().split(), 'email_lc': email.lower()}
+
+
+def backfill_search_fields(db, batch_size=1000):
+    """Add search_fields to patients stored before they existed; returns how many."""
+    query = {'name_words': {'$exists': False}}
+    ops, updated = [], 0
+    for doc in db.patients.find(query, {'name': 1, 'email': 1}).batch_size(batch_size):
+        fields = search_fields(str(doc.get('name') or ''), str(doc.get('email') or ''))
+        ops.append(UpdateOne({'_id': doc['_id']}, {'$set': fields}))
+        if len(ops) == batch_size:
+            updated += db.patients.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += db.patients.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+def file_format(filename):
+    """'csv' or 'parquet' from the upload's extension, or None."""
+    return FORMATS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def _normalize_columns(df):
+    columns = {}
+    for column in df.columns:
+        field = COLUMN_ALIASES.get(str(column).strip().lower())
+        if field is not None and field not in columns.values():
+            columns[column] = field
+    missing = [field for field in IMPORT_FIELDS if field not in columns.values()]
+    if missing:
+        raise ImportFileError(f"Missing columns: {', '.join(missing)}")
+    return df[list(columns)].rename(columns=columns)
+
+
+def read_chunks(stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of at most ``chunk_size`` rows from a file object."""
+    if fmt == 'csv':
+        import pandas as pd
+        try:
+            # Everything as text: validation does its own numeric coercion
+            reader = pd.read_csv(stream, chunksize=chunk_size, dtype=str,
+                                 keep_default_na=False, skipinitialspace=True)
+            for chunk in reader:
+                yield chunk
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            raise ImportFileError(f"Could not read CSV file: {e}")
+    elif fmt == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+            import pyarrow as pa
+        except ImportError:
+            raise ImportFileError("Parquet import requires pyarrow to be installed.")
+        try:
+            parquet_file = pq.ParquetFile(stream)
+            for batch in parquet_file.iter_batches(batch_size=chunk_size):
+                yield batch.to_pandas()
+        except pa.ArrowException as e:
+            raise ImportFileError(f"Could not read Parquet file: {e}")
+    else:
+        raise ImportFileError("Unsupported file type; upload a .csv or .parquet file.")
+
+
+def validate_chunk(df, first_row=1):
+    """Validate one chunk column-wise.
+
+    Returns ``(valid, rejects)``: a DataFrame of the valid rows in
+    IMPORT_FIELDS order with text stripped and health fields as floats,
+    and a list of ``{'row', 'errors'}`` dicts numbered from ``first_row``.
+    """
+    import pandas as pd
+
+    df = _normalize_columns(df).reset_index(drop=True)
+    clean = pd.DataFrame(index=df.index)
+    for field in TEXT_FIELDS:
+        clean[field] = df[field].fillna('').astype(str).str.strip()
+    for field in INPUT_FIELDS:
+        values = pd.to_numeric(df[field], errors='coerce').astype(np.float64)
+        clean[field] = values.where(np.isfinite(values))
+
+    missing_text = (clean[TEXT_FIELDS] == '').any(axis=1)
+    non_numeric = clean[INPUT_FIELDS].isna().any(axis=1)
+    checks = [
+        (missing_text, 'Name, phone, and email are required.'),
+        (~missing_text & ~clean['name'].str.fullmatch(NAME_PATTERN),
+         'Name must be at least 3 letters and contain only letters/spaces.'),
+        (~missing_text & ~clean['phone'].str.fullmatch(PHONE_PATTERN), 'Phone must be 10 to 15 digits.'),
+        (~missing_text & ~clean['email'].str.fullmatch(EMAIL_PATTERN), 'Please enter a valid email address.'),
+        (non_numeric, 'All health fields must be numeric and provided.'),
+        (~non_numeric & (clean['age'] <= 0), 'Age must be greater than 0.'),
+    ]
+
+    invalid = np.zeros(len(clean), dtype=bool)
+    errors = {}
+    for mask, message in checks:
+        mask = mask.to_numpy(dtype=bool)
+        invalid |= mask
+        for i in np.flatnonzero(mask).tolist():
+            errors.setdefault(i, []).append(message)
+    rejects = [{'row': first_row + i, 'errors': errors[i]} for i in sorted(errors)]
+    return clean[~invalid], rejects
+
+
+def _insert(db, docs, rows):
+    """insert_many ``docs``; returns rejects for the ones that failed."""
+    try:
+        db.patients.insert_many(docs, ordered=False)
+        return []
+    except BulkWriteError as e:
+        write_errors = e.details.get('writeErrors', [])
+        if write_errors:
+            logger.error("Patient import: %d of %d inserts failed: %s",
+                         len(write_errors), len(docs), write_errors[0].get('errmsg'))
+        return [{'row': rows[err['index']], 'errors': ['Could not be saved.']} for err in write_errors]
+
+
+def import_patients(db, stream, fmt, chunk_size=DEFAULT_CHUNK_SIZE, predictor=None,
+                    model_version=None, max_rejects=DEFAULT_MAX_REJECTS):
+    """Validate and insert every row of an uploaded patient file.
+
+    Rows are numbered from 1, not counting the header. With ``predictor``,
+    valid rows are scored before they are inserted. Returns a summary dict
+    with counts and the first ``max_rejects`` rejected rows. Raises
+    ImportFileError when the file itself cannot be read; if that happens
+    after rows were imported, the rows before 'stopped_at_row' are already
+    saved and the error's ``summary`` says so.
+    """
+    summary = {'format': fmt, 'rows': 0, 'imported': 0, 'rejected': 0, 'scored': 0, 'rejects': []}
+
+    def reject(rejects):
+        summary['rejected'] += len(rejects)
+        room = max_rejects - len(summary['rejects'])
+        if room > 0:
+            summary['rejects'].extend(rejects[:room])
+
+    try:
+        for chunk in read_chunks(stream, fmt, chunk_size):
+            first_row = summary['rows'] + 1
+            # Raises on a bad header before any row is counted
+            valid, rejects = validate_chunk(chunk, first_row)
+            summary['rows'] += len(chunk)
+            reject(rejects)
+            if valid.empty:
+                continue
+
+            now = datetime.utcnow()
+            name_lc = valid['name'].str.lower()
+            valid = valid.assign(name_lc=name_lc, name_words=name_lc.str.split(), email_lc=valid['email'].str.lower())
+            docs = [
+                {'_id': str(uuid.uuid4()), **record, 'created_at': now}
+                for record in valid.to_dict('records')
+            ]
+            if predictor is not None:
+                result = predictor.predict_batch(valid[INPUT_FIELDS].to_numpy())
+                for doc, fields in zip(docs, scored_fields(result, model_version, now)):
+                    doc.update(fields)
+            failed = _insert(db, docs, (valid.index + first_row).tolist())
+            reject(failed)
+            summary['imported'] += len(docs) - len(failed)
+            if predictor is not None:
+                summary['scored'] += len(docs) - len(failed)
+    except ImportFileError as e:
+        if summary['imported']:
+            # The failing chunk is not saved at all
+            summary.update(stopped_at_row=summary['rows'] + 1, error=str(e).strip())
+            e.summary = summary
+        raise
+    return summary
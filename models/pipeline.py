@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from models.features import RAW_FEATURES, FeaturePipeline
+from models.tree_engine import TreeEnsembleEngine
+from utils.metrics import PREDICTION_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Number of synthetic rows used to check the tree engine against the model
+PROBE_ROWS = 512
+
+# Largest batch evaluated by the NumPy tree engine; bigger batches go through
+# the model itself, whose compiled predict is faster at that size
+DEFAULT_ENGINE_MAX_ROWS = 32
+
+
+class InferencePipeline:
+    """Raw 7-value inputs to class probabilities in one NumPy pass.
+
+    The FeaturePipeline (zero imputation and engineered columns) writes
+    into a per-thread preallocated buffer, which is then scaled in place
+    with the fitted scaler statistics (the same arithmetic as
+    StandardScaler.transform, without pandas or validation).
+    For tree ensembles, batches of up to ``engine_max_rows`` rows are instead
+    evaluated by a TreeEnsembleEngine with the scaling folded into its split
+    thresholds; the engine is only used if it reproduces the original
+    probabilities exactly on probe data.
+
+    ``model`` may also be a zero-argument function returning the estimator,
+    together with an ``engine`` that was checked when the artifact was saved.
+    The estimator (and scikit-learn or XGBoost with it) is then only loaded
+    for the first batch larger than ``engine_max_rows``.
+    """
+
+    def __init__(self, model, scaler, engine_max_rows=DEFAULT_ENGINE_MAX_ROWS, engine=None,
+                 feature_pipeline=None):
+        self.feature_pipeline = feature_pipeline or FeaturePipeline()
+        self.mean = np.ascontiguousarray(scaler.mean_, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scaler.scale_, dtype=np.float64)
+        self.engine_max_rows = engine_max_rows
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        if engine is not None and engine_max_rows:
+            self._model, self._load = None, model
+            self.engine = engine
+            self.classes_ = engine.classes
+            return
+
+        self._model = self._prepare(model() if callable(model) else model)
+        self.engine = None
+        self.classes_ = self._model.classes_
+        if engine_max_rows and np.all(self.scale > 0):
+            engine = TreeEnsembleEngine.from_model(self._model, self.mean, self.scale)
+            if engine is not None and self._agrees(engine):
+                self.engine = engine
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._prepare(self._load())
+        return self._model
+
+    @staticmethod
+    def _prepare(model):
+        if type(model).__name__ in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+            # Threaded forests add tree outputs in completion order, so
+            # their sums vary in the last bit between calls; a thread pool
+            # per request does not pay off at serving batch sizes anyway.
+            model.set_params(n_jobs=1)
+        return model
+
+    def _buffer(self, n):
+        buf = getattr(self._local, 'buf', None)
+        if buf is None or buf.shape[0] < n:
+            buf = np.empty((max(n, 1), self.feature_pipeline.n_features), dtype=np.float64)
+            self._local.buf = buf
+        return buf[:n]
+
+    def _scaled_predict_proba(self, features):
+        features -= self.mean
+        features /= self.scale
+        return self.model.predict_proba(features)
+
+    def _probe_inputs(self):
+        rng = np.random.default_rng(0)
+        n_raw = len(RAW_FEATURES)
+        raw = np.abs(rng.normal(self.mean[:n_raw], 2 * self.scale[:n_raw], size=(PROBE_ROWS, n_raw)))
+        # Real inputs are whole numbers or have a few decimals (BMI, DPF);
+        # those are the values that sit exactly on learned split points.
+        for i, decimals in enumerate((0, 1, 3)):
+            raw[i::3] = np.round(raw[i::3], decimals)
+        return raw
+
+    def _agrees(self, engine):
+        raw = self._probe_inputs()
+        expected = self._scaled_predict_proba(self.feature_pipeline.transform(raw))
+        actual = engine.predict_proba(self.feature_pipeline.transform(raw))
+        if np.array_equal(expected, actual):
+            return True
+        logger.warning("Tree engine disagrees with %s; using the model for all batches",
+                       type(self.model).__name__)
+        return False
+
+    def features(self, data):
+        """Engineered (unscaled) features for raw inputs, in a reused buffer."""
+        X = np.asarray(data, dtype=np.float64) if not hasattr(data, 'columns') else data
+        n = 1 if getattr(X, 'ndim', 2) == 1 else len(X)
+        return self.feature_pipeline.transform(X, out=self._buffer(n))
+
+    def predict_proba(self, data):
+        start = time.perf_counter()
+        features = self.features(data)
+        engineered = time.perf_counter()
+        PREDICTION_STAGE_SECONDS.observe(engineered - start, 'features')
+        if self.engine is not None and len(features) <= self.engine_max_rows:
+            probs = self.engine.predict_proba(features)
+            PREDICTION_STAGE_SECONDS.observe(time.perf_counter() - engineered, 'engine')
+            return probs
+        features -= self.mean
+        features /= self.scale
+        scaled = time.perf_counter()
+        PREDICTION_STAGE_SECONDS.observe(scaled - engineered, 'scale')
+        probs = self.model.predict_proba(features)
+        PREDICTION_STAGE_SECONDS.observe(time.perf_counter() - scaled, 'model')
+        return probs
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+
+import numpy as np
+
+from models.registry import get_predictor
+from utils.cache import TTLCache, SQLiteCache
+from utils.metrics import PREDICTION_STAGE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class PredictionCache:
+    """Results of ServingPredictor.predict keyed by input and model version.
+
+    Inputs are rounded to ``decimals`` places and the prediction is computed
+    on the rounded values, so a cached result is exactly what the model
+    returns for its key. The model version is part of the key, so publishing
+    a new model makes older entries unreachable; they age out of the LRU.
+
+    A per-process LRU sits in front of an optional SQLite file shared by all
+    workers on the host. Errors in the shared tier are logged and treated as
+    misses, so predictions never fail because of the cache.
+    """
+
+    def __init__(self, maxsize=4096, ttl=3600.0, decimals=3, shared_path=None, enabled=True):
+        self.decimals = decimals
+        self.enabled = enabled
+        self.shared_errors = 0
+        self._lock = threading.Lock()
+        self.configure(maxsize, ttl, shared_path)
+
+    def configure(self, maxsize, ttl, shared_path=None):
+        self.local = TTLCache(maxsize, ttl)
+        # The shared file serves every worker, so it holds more entries
+        self.shared = SQLiteCache(shared_path, maxsize=maxsize * 16, ttl=ttl) if shared_path else None
+
+    def init_app(self, app):
+        self.decimals = app.config.get('PREDICTION_CACHE_DECIMALS', self.decimals)
+        self.enabled = app.config.get('PREDICTION_CACHE_ENABLED', self.enabled)
+        self.configure(app.config.get('PREDICTION_CACHE_SIZE', self.local.maxsize),
+                       app.config.get('PREDICTION_CACHE_TTL', self.local.ttl),
+                       app.config.get('PREDICTION_CACHE_PATH'))
+        app.extensions['prediction_cache'] = self
+
+    def normalize(self, features):
+        """Inputs as the list of rounded floats that is scored and cached."""
+        values = np.round(np.asarray(features, dtype=np.float64), self.decimals) + 0.0  # no -0.0
+        return values.tolist()
+
+    @staticmethod
+    def key(values, model_version):
+        return f"{model_version}:{','.join(repr(v) for v in values)}"
+
+    def _shared_call(self, method, *args):
+        try:
+            return getattr(self.shared, method)(*args)
+        except Exception as e:
+            with self._lock:
+                self.shared_errors += 1
+            logger.warning("Shared prediction cache %s failed: %s", method, e)
+            return None
+
+    def predict(self, predictor, features):
+        """``predictor.predict`` on the normalized inputs, served from cache when possible."""
+        values = self.normalize(features)
+        if not self.enabled:
+            return predictor.predict(values)
+        start = time.perf_counter()
+        key = self.key(values, predictor.model_version)
+        result = self.local.get(key)
+        if result is None and self.shared is not None:
+            result = self._shared_call('get', key)
+            if result is not None:
+                self.local.set(key, result)
+        PREDICTION_STAGE_SECONDS.observe(time.perf_counter() - start, 'cache_lookup')
+        if result is not None:
+            return dict(result)
+        raw = predictor.predict(values)
+        # Plain Python values so results can go to the shared tier as JSON
+        result = {
+            'prediction': raw['prediction'],
+            'risk_percentage': float(raw['risk_percentage']),
+            'confidence': float(raw['confidence']),
+            'probability': raw['probability'],
+            'model_used': raw['model_used'],
+            'model_version': predictor.model_version,
+        }
+        self.local.set(key, result)
+        if self.shared is not None:
+            self._shared_call('set', key, result)
+        return dict(result)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self._shared_call('clear')
+
+    def stats(self):
+        local = self.local.stats()
+        stats = {'enabled': self.enabled, 'local': local}
+        hits, lookups = local['hits'], local['hits'] + local['misses']
+        if self.shared is not None:
+            shared = {'hits': self.shared.hits, 'misses': self.shared.misses,
+                      'errors': self.shared_errors}
+            stats['shared'] = shared
+            # Local misses are shared lookups, so only shared hits add up
+            hits += shared['hits']
+        stats['hits'] = hits
+        stats['lookups'] = lookups
+        stats['hit_rate'] = hits / lookups if lookups else 0.0
+        return stats
+
+
+prediction_cache = PredictionCache()
+
+
+def predict_cached(features):
+    """Predict for one raw 7-value input with the shared model, through the cache."""
+    with PREDICTION_STAGE_SECONDS.time('model_lookup'):
+        predictor = get_predictor()
+    return prediction_cache.predict(predictor, features)
@@ -0,0 +1,174 @@
+from datetime import datetime, timedelta
+import logging
+
+from models.features import INPUT_FIELDS
+from models.scoring import RISK_BANDS, risk_bands
+from utils.write_behind import write_behind
+
+logger = logging.getLogger(__name__)
+
+# Day buckets are UTC calendar days stored as 'YYYY-MM-DD' strings, which
+# sort and range-match like dates without needing date operators
+DAY_FORMAT = '%Y-%m-%d'
+DEFAULT_TREND_LIMIT = 100
+
+
+def day_of(timestamp):
+    return timestamp.strftime(DAY_FORMAT)
+
+
+def prediction_document(result, features, user_id=None, patient_id=None, source='web'):
+    """A `predictions` document for one result of predict_cached/predict."""
+    created_at = datetime.utcnow()
+    return {
+        'user_id': user_id,
+        'patient_id': patient_id,
+        'source': source,
+        'inputs': dict(zip(INPUT_FIELDS, (float(v) for v in features))),
+        'probability': result.get('probability'),
+        'risk_percentage': float(result['risk_percentage']),
+        'risk_band': str(risk_bands([result['risk_percentage']])[0]),
+        'prediction': result['prediction'],
+        'model_name': result['model_used'],
+        'model_version': result.get('model_version'),
+        'created_at': created_at,
+        'day': day_of(created_at),
+    }
+
+
+def record_prediction(result, features, user_id=None, patient_id=None, source='web'):
+    """Store a served prediction through the write-behind queue; never raises."""
+    try:
+        write_behind.insert('predictions', prediction_document(result, features, user_id, patient_id, source))
+    except Exception as e:
+        logger.error("Failed to queue prediction: %s", e)
+
+
+# -----------------------
+# Daily rollups
+# -----------------------
+def _daily_group_stages(match):
+    band_counts = {
+        f'band_{band}': {'$sum': {'$cond': [{'$eq': ['$risk_band', band]}, 1, 0]}}
+        for band in RISK_BANDS
+    }
+    return [
+        {'$match': match},
+        {'$group': {
+            '_id': {'day': '$day', 'model_name': '$model_name'},
+            'count': {'$sum': 1},
+            'high_risk': {'$sum': {'$cond': [{'$eq': ['$prediction', 'High Risk']}, 1, 0]}},
+            'probability_sum': {'$sum': '$probability'},
+            **band_counts,
+        }},
+        {'$project': {
+            '_id': 0, 'day': '$_id.day', 'model_name': '$_id.model_name',
+            'count': 1, 'high_risk': 1, 'probability_sum': 1,
+            'bands': {band: f'$band_{band}' for band in RISK_BANDS},
+        }},
+    ]
+
+
+def rollup_daily(db, since_day):
+    """Recompute prediction_daily for every day from ``since_day`` on.
+
+    Each (day, model_name) row is replaced by $merge, so rerunning a day is
+    idempotent. Days before ``since_day`` are left as they are.
+    """
+    pipeline = _daily_group_stages({'day': {'$gte': since_day}}) + [
+        {'$set': {'updated_at': datetime.utcnow()}},
+        {'$merge': {
+            'into': 'prediction_daily',
+            'on': ['day', 'model_name'],
+            'whenMatched': 'replace',
+            'whenNotMatched': 'insert',
+        }},
+    ]
+    db.predictions.aggregate(pipeline)
+
+
+def _days(start_day, end_day):
+    """Every day in [start_day, end_day] as DAY_FORMAT strings."""
+    day = datetime.strptime(start_day, DAY_FORMAT)
+    end = datetime.strptime(end_day, DAY_FORMAT)
+    days = []
+    while day <= end:
+        days.append(day_of(day))
+        day += timedelta(days=1)
+    return days
+
+
+def daily_summaries(db, start_day, end_day):
+    """Per-day, per-model rows for [start_day, end_day].
+
+    Completed days come from the prediction_daily rollups when a rollup ran
+    after the day ended. Today, and past days whose rollup is missing (the
+    job has not run for them yet) or was computed while the day was still
+    going, are aggregated live from `predictions`.
+    """
+    today = day_of(datetime.utcnow())
+    rows, live_days = [], []
+    if start_day < today:
+        past_end = min(end_day, day_of(datetime.utcnow() - timedelta(days=1)))
+        rollups = {}
+        for row in db.prediction_daily.find(
+            {'day': {'$gte': start_day, '$lte': end_day, '$lt': today}}, {'_id': 0}
+        ):
+            rollups.setdefault(row['day'], []).append(row)
+        for day in _days(start_day, past_end):
+            day_end = datetime.strptime(day, DAY_FORMAT) + timedelta(days=1)
+            day_rows = rollups.get(day)
+            if day_rows and all(row.get('updated_at', day_end) >= day_end for row in day_rows):
+                rows.extend({k: v for k, v in row.items() if k != 'updated_at'} for row in day_rows)
+            else:
+                live_days.append(day)
+    if start_day <= today <= end_day:
+        live_days.append(today)
+    if live_days:
+        rows.extend(db.predictions.aggregate(_daily_group_stages({'day': {'$in': live_days}})))
+    rows.sort(key=lambda row: (row['day'], row['model_name'] or ''))
+    return rows
+
+
+def daily_counts(db, start_day, end_day):
+    """Prediction and high-risk counts per day, summed over models."""
+    days = {}
+    for row in daily_summaries(db, start_day, end_day):
+        day = days.setdefault(row['day'], {'day': row['day'], 'count': 0, 'high_risk': 0})
+        day['count'] += row['count']
+        day['high_risk'] += row['high_risk']
+    return list(days.values())
+
+
+def risk_distribution(db, start_day, end_day):
+    """Predictions per risk band over [start_day, end_day], with mean probability."""
+    bands = {band: 0 for band in RISK_BANDS}
+    count, probability_sum = 0, 0.0
+    for row in daily_summaries(db, start_day, end_day):
+        for band, n in row['bands'].items():
+            bands[band] = bands.get(band, 0) + n
+        count += row['count']
+        probability_sum += row['probability_sum'] or 0.0
+    return {
+        'count': count,
+        'bands': bands,
+        'mean_probability': probability_sum / count if count else None,
+    }
+
+
+def patient_trend(db, patient_id, limit=DEFAULT_TREND_LIMIT):
+    """The latest ``limit`` predictions of a patient, oldest first."""
+    pipeline = [
+        {'$match': {'patient_id': patient_id}},
+        {'$sort': {'created_at': -1}},
+        {'$limit': limit},
+        {'$project': {'_id': 0, 'created_at': 1, 'probability': 1, 'risk_percentage': 1,
+                      'risk_band': 1, 'prediction': 1, 'model_name': 1, 'model_version': 1}},
+        {'$sort': {'created_at': 1}},
+    ]
+    return list(db.predictions.aggregate(pipeline))
+
+
+def default_range(days=30):
+    end = datetime.utcnow()
+    return day_of(end - timedelta(days=days - 1)), day_of(end)
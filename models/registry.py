@@ -0,0 +1,166 @@
+import logging
+import os
+import threading
+import time
+
+from models.artifact import default_model_path, watch_file
+from models.serving import ServingPredictor
+from utils.metrics import metrics
+
+MODEL_LOAD_SECONDS = metrics.histogram('model_load_seconds', 'Time to load a model artifact.')
+MODEL_LOADS = metrics.counter('model_loads_total', 'Model loads by result (success or error).', ['result'])
+
+logger = logging.getLogger(__name__)
+
+
+class ModelRegistry:
+    """Process-wide holder of the fitted ServingPredictor.
+
+    The artifact is loaded once per worker and the same predictor instance is
+    handed to every request; callers must treat it as read-only. When the
+    artifact changes on disk (a new CURRENT version, or a rewritten legacy
+    .pkl), a background thread loads it and swaps it in, so requests keep
+    using the previous predictor until the new one is ready.
+    """
+
+    def __init__(self, model_path=None, check_interval=5.0, engine_max_rows=None):
+        self._model_path = model_path
+        self.check_interval = check_interval
+        self.engine_max_rows = engine_max_rows
+        self.version = None
+        self.load_count = 0
+        self.last_error = None
+        self._predictor = None
+        self._stamp = None
+        self._last_check = 0.0
+        self._reloading = False
+        self._lock = threading.Lock()
+
+    @property
+    def model_path(self):
+        # Unless configured, follow whichever default exists at load time
+        return self._model_path or default_model_path()
+
+    def init_app(self, app):
+        self._model_path = app.config.get('MODEL_PATH') or self._model_path
+        self.check_interval = app.config.get('MODEL_RELOAD_INTERVAL', self.check_interval)
+        self.engine_max_rows = app.config.get('INFERENCE_ENGINE_MAX_ROWS', self.engine_max_rows)
+        app.extensions['model_registry'] = self
+
+    def get(self):
+        """Return the shared predictor, loading it on first use."""
+        predictor = self._predictor
+        if predictor is None:
+            with self._lock:
+                if self._predictor is None:
+                    self._install(*self._load())
+                return self._predictor
+        self._maybe_reload()
+        return predictor
+
+    @property
+    def is_loaded(self):
+        return self._predictor is not None
+
+    @property
+    def model_name(self):
+        predictor = self._predictor
+        return predictor.best_model_name if predictor is not None else None
+
+    def _file_stamp(self):
+        path = watch_file(self.model_path)
+        st = os.stat(path)
+        return path, st.st_mtime_ns, st.st_size
+
+    def _load(self):
+        start = time.perf_counter()
+        try:
+            model_path = self.model_path
+            stamp = self._file_stamp()
+            predictor = ServingPredictor()
+            if self.engine_max_rows is not None:
+                predictor.engine_max_rows = self.engine_max_rows
+            predictor.load_model(model_path)
+            version = predictor.model_version
+            # Build the compiled pipeline before the predictor serves requests;
+            # with a stored tree engine the estimator itself stays unloaded
+            predictor.pipeline
+        except Exception:
+            MODEL_LOADS.inc('error')
+            raise
+        MODEL_LOADS.inc('success')
+        MODEL_LOAD_SECONDS.observe(time.perf_counter() - start)
+        return predictor, version, stamp
+
+    def _install(self, predictor, version, stamp):
+        self._predictor = predictor
+        self.version = version
+        self._stamp = stamp
+        self.load_count += 1
+        self.last_error = None
+        logger.info("Model %s (version %s) loaded from %s",
+                    predictor.best_model_name, version, self.model_path)
+
+    def _maybe_reload(self):
+        now = time.monotonic()
+        if self._reloading or now - self._last_check < self.check_interval:
+            return
+        self._last_check = now
+        try:
+            stamp = self._file_stamp()
+        except OSError:
+            # Artifact temporarily missing (e.g. mid-replace): keep serving.
+            return
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if self._reloading:
+                return
+            self._reloading = True
+        threading.Thread(target=self._reload, args=(stamp,), daemon=True,
+                         name='model-reload').start()
+
+    def _reload(self, stamp):
+        try:
+            self._install(*self._load())
+            return True
+        except Exception as e:
+            # Remember the stamp so a broken file is not retried on every
+            # request; the next write to the file triggers another attempt.
+            self._stamp = stamp
+            self.last_error = str(e)
+            logger.error("Model reload failed, keeping version %s: %s", self.version, e)
+            return False
+        finally:
+            self._reloading = False
+
+    def refresh(self):
+        """Reload now if the artifact changed on disk; True if a new predictor was installed.
+
+        Used by the gunicorn master (gunicorn.conf.py), which reloads the
+        model itself and then replaces its workers, so that they keep sharing
+        one copy instead of each loading its own.
+        """
+        try:
+            stamp = self._file_stamp()
+        except OSError:
+            return False
+        if stamp == self._stamp:
+            return False
+        return self._reload(stamp)
+
+    def _after_fork(self):
+        # A lock held by a thread of the parent would never be released here
+        self._lock = threading.Lock()
+        self._reloading = False
+
+
+model_registry = ModelRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=model_registry._after_fork)
+
+
+def get_predictor():
+    """Shortcut for the shared predictor of this worker process."""
+    return model_registry.get()
@@ -0,0 +1,146 @@
+from datetime import datetime
+import threading
+
+import numpy as np
+from pymongo import UpdateOne
+
+from models.features import INPUT_FIELDS
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Only what is needed to rebuild the model inputs
+FEATURE_PROJECTION = {field: 1 for field in INPUT_FIELDS}
+
+# Dashboard risk bands over risk_percentage: [lower, upper)
+RISK_BANDS = {
+    'low': (0, 30),
+    'moderate': (30, 60),
+    'high': (60, float('inf')),
+}
+
+_run_lock = threading.Lock()
+
+
+def risk_bands(risk_percentage):
+    """Map an array of risk percentages to RISK_BANDS names."""
+    risk = np.asarray(risk_percentage)
+    names = list(RISK_BANDS)
+    return np.select(
+        [(risk >= lo) & (risk < hi) for lo, hi in RISK_BANDS.values()],
+        names, default=names[0]
+    )
+
+
+def stale_patients_query(model_version):
+    """Patients never scored, scored by another model, or edited since.
+
+    Patients whose inputs could not be scored (``score_error``) are left
+    alone until they are edited.
+    """
+    return {'$or': [
+        {'scored_at': {'$exists': False}, 'score_error': {'$exists': False}},
+        {'scored_at': {'$exists': True}, 'model_version': {'$ne': model_version}},
+        {'scored_at': {'$exists': True}, 'updated_at': {'$exists': True},
+         '$expr': {'$gt': ['$updated_at', '$scored_at']}},
+        {'score_error': {'$exists': True}, 'updated_at': {'$exists': True},
+         '$expr': {'$gt': ['$updated_at', '$score_error_at']}},
+    ]}
+
+
+# Set on a patient by a successful scoring run
+SCORED_FIELDS = ('risk_percentage', 'risk_band', 'prediction', 'model_name', 'model_version', 'scored_at')
+
+
+def scored_fields(result, model_version, scored_at):
+    """The fields stored on each patient for a predict_batch result."""
+    return [
+        {
+            'risk_percentage': risk,
+            'risk_band': band,
+            'prediction': prediction,
+            'model_name': result['model_used'],
+            'model_version': model_version,
+            'scored_at': scored_at,
+        }
+        for prediction, risk, band in zip(
+            result['prediction'].tolist(), result['risk_percentage'].tolist(),
+            risk_bands(result['risk_percentage']).tolist()
+        )
+    ]
+
+
+def _score_chunk(db, predictor, model_version, docs, scored_at):
+    X = np.empty((len(docs), len(INPUT_FIELDS)), dtype=np.float64)
+    ids = []
+    ops = []
+    for doc in docs:
+        try:
+            X[len(ids)] = [float(doc[field]) for field in INPUT_FIELDS]
+        except (KeyError, TypeError, ValueError):
+            # Marked so incremental runs skip it until it is edited; an older
+            # score no longer describes the patient
+            ops.append(UpdateOne({'_id': doc['_id']}, {
+                '$set': {'score_error': 'Missing or non-numeric inputs', 'score_error_at': scored_at},
+                '$unset': {field: '' for field in SCORED_FIELDS},
+            }))
+            continue
+        ids.append(doc['_id'])
+    if ids:
+        result = predictor.predict_batch(X[:len(ids)])
+        ops.extend(
+            UpdateOne({'_id': _id}, {'$set': fields, '$unset': {'score_error': '', 'score_error_at': ''}})
+            for _id, fields in zip(ids, scored_fields(result, model_version, scored_at))
+        )
+    if ops:
+        db.patients.bulk_write(ops, ordered=False)
+    return len(ids)
+
+
+def score_patients(db, predictor, model_version, batch_size=DEFAULT_BATCH_SIZE, full=False):
+    """Score patients in chunks and store the results on their documents.
+
+    By default only stale patients (see stale_patients_query) are rescored;
+    ``full=True`` rescores the whole collection. Returns a summary dict, which
+    is also recorded in the ``scoring_runs`` collection. Raises RuntimeError
+    if another run is already in progress in this process.
+    """
+    if not _run_lock.acquire(blocking=False):
+        raise RuntimeError("A scoring run is already in progress.")
+    try:
+        started_at = datetime.utcnow()
+        query = {} if full else stale_patients_query(model_version)
+        cursor = (db.patients.find(query, FEATURE_PROJECTION)
+                  .sort('_id', 1)
+                  .batch_size(batch_size))
+        seen = scored = 0
+        chunk = []
+        for doc in cursor:
+            chunk.append(doc)
+            if len(chunk) == batch_size:
+                scored += _score_chunk(db, predictor, model_version, chunk, started_at)
+                seen += len(chunk)
+                chunk = []
+        if chunk:
+            scored += _score_chunk(db, predictor, model_version, chunk, started_at)
+            seen += len(chunk)
+        summary = {
+            'started_at': started_at,
+            'finished_at': datetime.utcnow(),
+            'model_name': predictor.best_model_name,
+            'model_version': model_version,
+            'full': full,
+            'scored': scored,
+            'skipped': seen - scored,
+        }
+        db.scoring_runs.insert_one(dict(summary))
+        return summary
+    finally:
+        _run_lock.release()
+
+
+def scoring_in_progress():
+    return _run_lock.locked()
+
+
+def last_scoring_run(db):
+    return db.scoring_runs.find_one(sort=[('finished_at', -1)])
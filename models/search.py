@@ -0,0 +1,261 @@
+import hashlib
+import json
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import f1_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'search_cache')
+
+# Parameter spaces per entry of DiabetesPredictor.models
+DEFAULT_SEARCH_SPACES = {
+    'RandomForest': {
+        'n_estimators': [100, 300],
+        'max_depth': [None, 8, 16],
+        'min_samples_leaf': [1, 2, 4],
+        'max_features': ['sqrt', 0.5],
+    },
+    'LogisticRegression': {
+        'C': [0.01, 0.1, 1.0, 10.0],
+    },
+    'KNN': {
+        'n_neighbors': [3, 5, 9, 15, 25],
+        'weights': ['uniform', 'distance'],
+    },
+    'XGBoost': {
+        # Upper bound only: the number of rounds is set by early stopping
+        'n_estimators': [1000],
+        'learning_rate': [0.03, 0.1],
+        'max_depth': [3, 5, 7],
+        'subsample': [0.8, 1.0],
+        'colsample_bytree': [0.8, 1.0],
+    },
+}
+
+# Estimator parameter controlling its internal threading
+THREAD_PARAMS = {
+    'RandomForestClassifier': 'n_jobs',
+    'KNeighborsClassifier': 'n_jobs',
+    'XGBClassifier': 'n_jobs',
+}
+
+_worker_data = {}
+
+
+def _init_worker(X, y):
+    # Ship the dataset once per worker instead of once per task
+    _worker_data['X'], _worker_data['y'] = X, y
+
+
+def _is_xgboost(estimator):
+    return type(estimator).__name__ == 'XGBClassifier'
+
+
+def fit_fold(estimator, params, train_idx, val_idx, early_stopping_rounds, X=None, y=None):
+    """Fit one parameter set on one fold; returns its validation F1.
+
+    XGBoost is stopped early on the validation fold and also reports the
+    best boosting round.
+    """
+    X = _worker_data['X'] if X is None else X
+    y = _worker_data['y'] if y is None else y
+    model = clone(estimator).set_params(**params)
+    result = {}
+    if _is_xgboost(model) and early_stopping_rounds:
+        model.set_params(early_stopping_rounds=early_stopping_rounds)
+        model.fit(X[train_idx], y[train_idx],
+                  eval_set=[(X[val_idx], y[val_idx])], verbose=False)
+        result['best_iteration'] = int(model.best_iteration)
+    else:
+        model.fit(X[train_idx], y[train_idx])
+    result['score'] = float(f1_score(y[val_idx], model.predict(X[val_idx])))
+    return result
+
+
+class HyperparameterSearch:
+    """Stratified k-fold search over parameter spaces for each candidate.
+
+    ``strategy`` is 'grid' (every combination), 'random' (``n_iter`` samples
+    per model) or 'halving' (successive halving, where the resource is the
+    number of folds a candidate is evaluated on). Fold results are cached on
+    disk keyed by dataset hash, estimator, parameters and fold, so repeated
+    searches only fit what has not been evaluated before.
+    """
+
+    def __init__(self, spaces=None, strategy='grid', n_folds=5, n_iter=20,
+                 halving_factor=3, early_stopping_rounds=30, n_workers=None,
+                 cache_dir=DEFAULT_CACHE_DIR, random_state=42):
+        if strategy not in ('grid', 'random', 'halving'):
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        self.spaces = DEFAULT_SEARCH_SPACES if spaces is None else spaces
+        self.strategy = strategy
+        self.n_folds = n_folds
+        self.n_iter = n_iter
+        self.halving_factor = halving_factor
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.cache_dir = cache_dir
+        self.random_state = random_state
+
+    # -----------------------
+    # Candidates
+    # -----------------------
+    def candidates(self, model_name):
+        space = self.spaces.get(model_name, {})
+        if not space:
+            return [{}]
+        grid = ParameterGrid(space)
+        if self.strategy == 'grid' or len(grid) <= self.n_iter:
+            return list(grid)
+        return list(ParameterSampler(space, n_iter=self.n_iter, random_state=self.random_state))
+
+    # -----------------------
+    # Fold result cache
+    # -----------------------
+    @staticmethod
+    def dataset_hash(X, y):
+        digest = hashlib.sha256()
+        for arr in (X, y):
+            arr = np.ascontiguousarray(arr)
+            digest.update(str((arr.dtype, arr.shape)).encode())
+            digest.update(arr.tobytes())
+        return digest.hexdigest()
+
+    def _cache_path(self, data_hash, estimator, params, fold):
+        base = {k: v for k, v in estimator.get_params().items() if k not in ('n_jobs', 'nthread')}
+        key = json.dumps({
+            'data': data_hash,
+            'estimator': type(estimator).__name__,
+            'base_params': base,
+            'params': params,
+            'fold': fold,
+            'n_folds': self.n_folds,
+            'random_state': self.random_state,
+            'early_stopping_rounds': self.early_stopping_rounds,
+        }, sort_keys=True, default=repr)
+        return os.path.join(self.cache_dir, hashlib.sha256(key.encode()).hexdigest() + '.json')
+
+    def _cache_get(self, path):
+        if not self.cache_dir:
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _cache_put(self, path, result):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+
+    # -----------------------
+    # Search
+    # -----------------------
+    def _evaluate(self, pool, folds, data_hash, estimator, tasks):
+        """Evaluate (candidate index, params, fold) tasks, using the cache."""
+        results, pending = {}, {}
+        for idx, params, fold in tasks:
+            path = self._cache_path(data_hash, estimator, params, fold)
+            cached = self._cache_get(path)
+            if cached is not None:
+                results[idx, fold] = cached
+                continue
+            train_idx, val_idx = folds[fold]
+            if pool is None:
+                result = fit_fold(estimator, params, train_idx, val_idx,
+                                  self.early_stopping_rounds, self._X, self._y)
+                self._cache_put(path, result)
+                results[idx, fold] = result
+            else:
+                future = pool.submit(fit_fold, estimator, params, train_idx, val_idx,
+                                     self.early_stopping_rounds)
+                pending[idx, fold] = (future, path)
+        for key, (future, path) in pending.items():
+            result = future.result()
+            self._cache_put(path, result)
+            results[key] = result
+        return results
+
+    def _search_model(self, pool, folds, data_hash, estimator, candidates):
+        fold_results = {}
+        alive = list(range(len(candidates)))
+        if self.strategy == 'halving':
+            n_rounds = max(1, math.ceil(math.log(len(candidates), self.halving_factor))) if len(candidates) > 1 else 1
+            schedule = [max(1, math.ceil(self.n_folds / self.halving_factor ** (n_rounds - 1 - r)))
+                        for r in range(n_rounds)]
+            schedule[-1] = self.n_folds
+        else:
+            schedule = [self.n_folds]
+        for r, n_folds in enumerate(schedule):
+            tasks = [(i, candidates[i], fold) for i in alive for fold in range(n_folds)
+                     if (i, fold) not in fold_results]
+            fold_results.update(self._evaluate(pool, folds, data_hash, estimator, tasks))
+            scores = {i: np.mean([fold_results[i, f]['score'] for f in range(n_folds)]) for i in alive}
+            if r < len(schedule) - 1:
+                keep = max(1, math.ceil(len(alive) / self.halving_factor))
+                alive = sorted(alive, key=lambda i: -scores[i])[:keep]
+        table = []
+        for i in alive:
+            folds_done = [fold_results[i, f] for f in range(self.n_folds)]
+            row = {'params': candidates[i], 'mean_f1': float(np.mean([r['score'] for r in folds_done])),
+                   'std_f1': float(np.std([r['score'] for r in folds_done]))}
+            iterations = [r['best_iteration'] for r in folds_done if 'best_iteration' in r]
+            if iterations:
+                row['best_iteration'] = int(round(np.mean(iterations)))
+            table.append(row)
+        table.sort(key=lambda row: -row['mean_f1'])
+        return table
+
+    def final_params(self, row):
+        """Parameters for refitting on the full training set."""
+        params = dict(row['params'])
+        if 'best_iteration' in row:
+            # Refit with the early-stopped number of rounds; no eval set then
+            params['n_estimators'] = row['best_iteration'] + 1
+        return params
+
+    def search(self, models, X, y):
+        """Search every model in ``models`` (name -> unfitted estimator).
+
+        Returns name -> {'best_params', 'best_score', 'results'}, where
+        'results' lists the fully evaluated candidates best first.
+        """
+        X, y = np.asarray(X), np.asarray(y)
+        self._X, self._y = X, y
+        data_hash = self.dataset_hash(X, y)
+        splitter = StratifiedKFold(n_splits=self.n_folds, shuffle=True, random_state=self.random_state)
+        folds = list(splitter.split(X, y))
+        workers = max(1, self.n_workers)
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        pool = None
+        if workers > 1:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(X, y))
+        try:
+            summary = {}
+            for model_name, estimator in models.items():
+                thread_param = THREAD_PARAMS.get(type(estimator).__name__)
+                if thread_param:
+                    estimator = clone(estimator).set_params(**{thread_param: threads})
+                candidates = self.candidates(model_name)
+                print(f"Searching {model_name}: {len(candidates)} candidates x {self.n_folds} folds ({self.strategy})")
+                table = self._search_model(pool, folds, data_hash, estimator, candidates)
+                summary[model_name] = {
+                    'best_params': self.final_params(table[0]),
+                    'best_score': table[0]['mean_f1'],
+                    'results': table,
+                }
+                print(f"  best CV F1 {table[0]['mean_f1']:.4f} with {summary[model_name]['best_params']}")
+            return summary
+        finally:
+            if pool is not None:
+                pool.shutdown()
+            self._X = self._y = None
@@ -0,0 +1,144 @@
+"""Serving side of the diabetes model: load a fitted model and score inputs.
+
+Only NumPy is imported here. scikit-learn and XGBoost are imported when the
+estimator is actually loaded, which for artifacts with a stored tree engine
+only happens for batches too large for the engine. Training lives in
+models/diabetes_model.py.
+"""
+import os
+import pickle
+
+import numpy as np
+
+from models.features import FEATURE_NAMES, FeaturePipeline
+from models.pipeline import InferencePipeline, DEFAULT_ENGINE_MAX_ROWS
+from models.artifact import ModelArtifact, default_model_path, is_artifact_path, file_hash
+
+
+class ServingPredictor:
+    def __init__(self):
+        try:
+            self.artifact = None
+            self.best_model = None
+            self.best_model_name = None
+            self.scaler = None
+            self.feature_names = list(FEATURE_NAMES)
+            # Imputation and engineered columns applied to raw inputs
+            self.feature_pipeline = FeaturePipeline()
+            self.training_data_hash = None
+            # Artifact version, or a content hash for legacy .pkl files
+            self.model_version = None
+            # Batches up to this size use the NumPy tree engine (0 disables it)
+            self.engine_max_rows = DEFAULT_ENGINE_MAX_ROWS
+            self.is_trained = False
+        except Exception as e:
+            raise Exception(f"Error in __init__: {e}")
+
+    @property
+    def best_model(self):
+        # Artifacts load the estimator on first use
+        if self._best_model is None and self.artifact is not None:
+            self._best_model = self.artifact.load_model()
+        return self._best_model
+
+    @best_model.setter
+    def best_model(self, model):
+        self._best_model = model
+        self._pipeline = None
+
+    @property
+    def scaler(self):
+        # StandardScaler needs scikit-learn; the pipeline only uses the statistics
+        if self._scaler is None and self.artifact is not None:
+            self._scaler = self.artifact.load_scaler()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+
+    @property
+    def pipeline(self):
+        """Compiled raw-input inference path for the best model (built on first use)."""
+        if self._pipeline is None and self.is_trained:
+            engine = None
+            if self.artifact is not None and self._best_model is None and self.engine_max_rows:
+                engine = self.artifact.load_engine()
+            if engine is not None:
+                self._pipeline = InferencePipeline(
+                    lambda: self.best_model, self.artifact.load_scaler_stats(),
+                    self.engine_max_rows, engine=engine, feature_pipeline=self.feature_pipeline
+                )
+            else:
+                self._pipeline = InferencePipeline(self.best_model, self.scaler, self.engine_max_rows,
+                                                   feature_pipeline=self.feature_pipeline)
+        return self._pipeline
+
+    @property
+    def model(self):
+        return self.best_model
+
+    def load_model(self, model_path=None):
+        """Load an artifact root/version directory, or a legacy .pkl file."""
+        try:
+            if model_path is None:
+                model_path = default_model_path()
+            if os.path.isdir(model_path) and is_artifact_path(model_path):
+                self.artifact = ModelArtifact(model_path)
+                self.best_model = None
+                self.scaler = None
+                self.best_model_name = self.artifact.model_name
+                self.feature_names = self.artifact.feature_names
+                self.feature_pipeline = self.artifact.load_feature_pipeline()
+                self.training_data_hash = self.artifact.manifest.get('training_data_hash')
+                self.model_version = self.artifact.version
+            else:
+                with open(model_path, 'rb') as f:
+                    saved_data = pickle.load(f)
+                    self.artifact = None
+                    self.best_model = saved_data['model']
+                    self.scaler = saved_data['scaler']
+                    self.best_model_name = saved_data.get('model_name', 'Unknown')
+                    self.feature_names = saved_data.get('feature_names', self.feature_names)
+                    self.feature_pipeline = FeaturePipeline.from_dict(saved_data.get('feature_pipeline', {}))
+                self.model_version = file_hash(model_path)[:12]
+            self.is_trained = True
+            print(f"Model ({self.best_model_name}) and scaler loaded successfully!")
+            return True
+        except Exception as e:
+            raise Exception(f"Error in load_model: {e}")
+
+    def predict(self, input_data):
+        try:
+            result = self.predict_batch([input_data])
+            return {
+                'prediction': str(result['prediction'][0]),
+                'risk_percentage': result['risk_percentage'][0],
+                'confidence': result['confidence'][0],
+                'probability': float(result['probability'][0]),
+                'model_used': result['model_used']
+            }
+        except Exception as e:
+            raise Exception(f"Error in predict: {e}")
+
+    def predict_batch(self, input_data):
+        """Score an (N, 7) array or DataFrame of raw inputs in one pass.
+
+        Returns columnar results: NumPy arrays for 'prediction',
+        'risk_percentage', 'confidence' and 'probability', plus 'model_used'.
+        """
+        try:
+            if not self.is_trained:
+                raise Exception("Model not trained yet!")
+            pipeline = self.pipeline
+            probs = pipeline.predict_proba(input_data)
+            labels = pipeline.classes_[probs.argmax(axis=1)]
+            return {
+                'prediction': np.where(labels == 1, 'High Risk', 'Low Risk'),
+                'risk_percentage': np.round(probs[:, 1] * 100, 2),
+                'confidence': np.round(probs.max(axis=1) * 100, 2),
+                'probability': probs[:, 1],
+                'model_used': self.best_model_name
+            }
+        except Exception as e:
+            raise Exception(f"Error in predict_batch: {e}")
@@ -0,0 +1,285 @@
+import ctypes
+import ctypes.util
+import json
+import math
+
+import numpy as np
+
+_SIGN_BIT = np.uint64(1 << 63)
+
+
+def _load_expf():
+    """The C library expf, which XGBoost's sigmoid calls.
+
+    NumPy's float32 exp is a different approximation, and float64 exp rounded
+    to float32 differs from expf in rare double-rounding cases.
+    """
+    try:
+        libm = ctypes.CDLL(ctypes.util.find_library('m') or 'libm.so.6')
+        expf = libm.expf
+    except (OSError, AttributeError):
+        return None
+    expf.restype = ctypes.c_float
+    expf.argtypes = [ctypes.c_float]
+    return expf
+
+
+_expf = _load_expf()
+
+
+def expf(x):
+    """Elementwise float32 exp computed like C expf."""
+    x = np.asarray(x, dtype=np.float32)
+    if _expf is None:
+        return np.exp(x.astype(np.float64)).astype(np.float32)
+    return np.fromiter(map(_expf, x.ravel().tolist()), dtype=np.float32, count=x.size).reshape(x.shape)
+
+
+def _ordered(x):
+    """Map float64 values to uint64 keys with the same ordering."""
+    bits = np.ascontiguousarray(x, dtype=np.float64).view(np.uint64)
+    return np.where(bits & _SIGN_BIT, ~bits, bits | _SIGN_BIT)
+
+
+def _unordered(keys):
+    bits = np.where(keys & _SIGN_BIT, keys & ~_SIGN_BIT, ~keys)
+    return bits.view(np.float64)
+
+
+def raw_thresholds(threshold, mean, scale, strict):
+    """Exact float64 split points on unscaled features.
+
+    The original model sends a sample left when
+    ``float32((x - mean) / scale) <= threshold`` (or ``<`` with ``strict``).
+    That predicate is monotone in x, so it equals ``x <= b`` for the largest
+    float64 b that still goes left; b is found by bisection over the float64
+    bit patterns, which takes at most 64 vectorized steps.
+    """
+    threshold = np.asarray(threshold, dtype=np.float64)
+    mean = np.broadcast_to(np.asarray(mean, dtype=np.float64), threshold.shape)
+    scale = np.broadcast_to(np.asarray(scale, dtype=np.float64), threshold.shape)
+
+    def goes_left(x):
+        with np.errstate(over='ignore', invalid='ignore'):
+            z = ((x - mean) / scale).astype(np.float32)
+        return z < threshold if strict else z <= threshold
+
+    # Invariant: lo goes left, hi goes right
+    lo = _ordered(np.full(threshold.shape, -np.inf))
+    hi = _ordered(np.full(threshold.shape, np.inf))
+    while True:
+        open_ = hi - lo > 1
+        if not open_.any():
+            break
+        mid = lo + (hi - lo) // np.uint64(2)
+        left = goes_left(_unordered(mid))
+        lo = np.where(open_ & left, mid, lo)
+        hi = np.where(open_ & ~left, mid, hi)
+    return _unordered(lo)
+
+
+def _tree_depth(left, right):
+    """Longest root-to-leaf path of a tree given its child arrays."""
+    depth, frontier = 0, np.array([0])
+    while True:
+        frontier = frontier[left[frontier] >= 0]
+        if not len(frontier):
+            return depth
+        frontier = np.concatenate([left[frontier], right[frontier]])
+        depth += 1
+
+
+class TreeEnsembleEngine:
+    """Tree ensemble flattened into contiguous node arrays.
+
+    All trees share one set of arrays (feature, threshold, left, right,
+    missing-goes-left, leaf value); ``roots`` holds each tree's first node.
+    Leaves point to themselves, so a batch is evaluated by advancing every
+    (row, tree) pair with vectorized gathers until it reaches a leaf. Thresholds
+    are exact float64 split points on the engineered but unscaled features
+    (see raw_thresholds), so no scaling or float32 cast happens per call.
+    """
+
+    # Arrays written by to_arrays; kind, max_depth and base_margin are 0-d
+    ARRAYS = ('feature', 'threshold', 'left', 'right', 'missing_left', 'value', 'roots', 'classes')
+
+    def __init__(self, kind, feature, threshold, left, right, missing_left, value,
+                 roots, max_depth, base_margin=0.0, classes=(0, 1)):
+        self.kind = kind
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_margin = base_margin
+        self.classes = np.asarray(classes)
+        self.is_leaf = left == np.arange(len(left))
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @classmethod
+    def from_model(cls, model, mean, scale):
+        """Build an engine for a fitted model, or None if it is unsupported."""
+        name = type(model).__name__
+        if name in ('RandomForestClassifier', 'ExtraTreesClassifier'):
+            return cls._from_forest(model, mean, scale)
+        if name == 'XGBClassifier':
+            return cls._from_xgboost(model, mean, scale)
+        return None
+
+    @staticmethod
+    def _assemble(trees):
+        """Concatenate per-tree node arrays and make leaves self-loops."""
+        offsets = np.cumsum([0] + [len(t['feature']) for t in trees[:-1]])
+        feature, threshold, left, right, missing_left = [], [], [], [], []
+        for offset, tree in zip(offsets, trees):
+            node_ids = np.arange(len(tree['feature'])) + offset
+            leaf = tree['left'] < 0
+            feature.append(np.where(leaf, 0, tree['feature']))
+            threshold.append(np.where(leaf, np.inf, tree['threshold']))
+            left.append(np.where(leaf, node_ids, tree['left'] + offset))
+            right.append(np.where(leaf, node_ids, tree['right'] + offset))
+            missing_left.append(np.where(leaf, True, tree['missing_left']))
+        return (
+            np.ascontiguousarray(np.concatenate(feature), dtype=np.intp),
+            np.ascontiguousarray(np.concatenate(threshold), dtype=np.float64),
+            np.ascontiguousarray(np.concatenate(left), dtype=np.intp),
+            np.ascontiguousarray(np.concatenate(right), dtype=np.intp),
+            np.ascontiguousarray(np.concatenate(missing_left), dtype=bool),
+            np.asarray(offsets, dtype=np.intp),
+        )
+
+    @classmethod
+    def _from_forest(cls, model, mean, scale):
+        if getattr(model, 'n_outputs_', 1) != 1:
+            return None
+        trees, values = [], []
+        max_depth = 0
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            internal = tree.children_left >= 0
+            threshold = tree.threshold.copy()
+            features = tree.feature[internal]
+            threshold[internal] = raw_thresholds(
+                threshold[internal], mean[features], scale[features], strict=False
+            )
+            missing = getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=bool))
+            trees.append({
+                'feature': tree.feature, 'threshold': threshold,
+                'left': tree.children_left, 'right': tree.children_right,
+                'missing_left': missing.astype(bool),
+            })
+            # Same leaf values DecisionTreeClassifier.predict_proba returns
+            values.append(tree.value[:, 0, :model.n_classes_])
+            max_depth = max(max_depth, tree.max_depth)
+        feature, threshold, left, right, missing_left, roots = cls._assemble(trees)
+        value = np.ascontiguousarray(np.concatenate(values), dtype=np.float64)
+        return cls('forest', feature, threshold, left, right, missing_left, value, roots,
+                   max_depth, classes=model.classes_)
+
+    @classmethod
+    def _from_xgboost(cls, model, mean, scale):
+        booster = model.get_booster()
+        learner = json.loads(booster.save_raw('json'))['learner']
+        gradient_booster = learner['gradient_booster']
+        if gradient_booster.get('name') != 'gbtree' or \
+                learner['objective']['name'] != 'binary:logistic':
+            return None
+        trees = gradient_booster['model']['trees']
+        best_iteration = booster.attr('best_iteration')
+        if best_iteration is not None:
+            # What XGBClassifier.predict_proba uses after early stopping
+            trees = trees[:int(best_iteration) + 1]
+        flat, values = [], []
+        max_depth = 0
+        for tree in trees:
+            if any(tree.get('split_type', [])):
+                return None  # categorical splits
+            left = np.asarray(tree['left_children'], dtype=np.intp)
+            right = np.asarray(tree['right_children'], dtype=np.intp)
+            internal = left >= 0
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            features = np.asarray(tree['split_indices'], dtype=np.intp)
+            threshold = conditions.astype(np.float64)
+            threshold[internal] = raw_thresholds(
+                conditions[internal], mean[features[internal]], scale[features[internal]], strict=True
+            )
+            flat.append({
+                'feature': features, 'threshold': threshold, 'left': left, 'right': right,
+                'missing_left': np.asarray(tree['default_left'], dtype=bool),
+            })
+            # Leaves keep their (learning-rate scaled) output in split_conditions
+            values.append(np.where(internal, np.float32(0), conditions))
+            max_depth = max(max_depth, _tree_depth(left, right))
+        feature, threshold, left, right, missing_left, roots = cls._assemble(flat)
+        value = np.ascontiguousarray(np.concatenate(values), dtype=np.float32)
+        base_score = np.float32(learner['learner_model_param']['base_score'].strip('[]'))
+        # -logf(1 / base_score - 1), as XGBoost converts it to a margin
+        base_margin = np.float32(-math.log(np.float32(1) / base_score - np.float32(1)))
+        return cls('xgboost', feature, threshold, left, right, missing_left, value, roots,
+                   max_depth, base_margin=base_margin, classes=model.classes_)
+
+    def to_arrays(self):
+        """Plain NumPy arrays for np.savez."""
+        arrays = {name: getattr(self, name) for name in self.ARRAYS}
+        arrays.update(kind=np.asarray(self.kind), max_depth=np.asarray(self.max_depth),
+                      base_margin=np.asarray(self.base_margin, dtype=np.float32))
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Inverse of to_arrays; ``arrays`` is a dict or an open NpzFile."""
+        kwargs = {name: np.ascontiguousarray(arrays[name]) for name in cls.ARRAYS}
+        return cls(str(arrays['kind']), max_depth=int(arrays['max_depth']),
+                   base_margin=np.float32(arrays['base_margin']), **kwargs)
+
+    def leaves(self, X):
+        """(N, n_trees) leaf node index of every row in every tree.
+
+        Only (row, tree) pairs that have not reached a leaf are advanced, so
+        the cost follows the actual path lengths rather than the deepest tree.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        n_rows, n_features = X.shape
+        values = X.ravel()
+        nodes = np.tile(self.roots, n_rows)
+        active = np.arange(nodes.size)
+        offsets = np.repeat(np.arange(n_rows) * n_features, self.n_trees)
+        current = nodes
+        while active.size:
+            x = values[offsets + self.feature[current]]
+            go_left = x <= self.threshold[current]
+            missing = np.isnan(x)
+            if missing.any():
+                go_left[missing] = self.missing_left[current[missing]]
+            current = np.where(go_left, self.left[current], self.right[current])
+            nodes[active] = current
+            inner = ~self.is_leaf[current]
+            active, current, offsets = active[inner], current[inner], offsets[inner]
+        return nodes.reshape(n_rows, self.n_trees)
+
+    def predict_proba(self, X):
+        leaf_values = self.value[self.leaves(X)]
+        if self.kind == 'forest':
+            # RandomForestClassifier adds the tree probabilities in tree order
+            # and then divides; cumsum keeps that order, a pairwise sum would not.
+            proba = np.cumsum(leaf_values, axis=1)[:, -1]
+            proba /= self.n_trees
+            return proba
+        # XGBoost starts from the base margin and adds trees in order in
+        # float32, then applies 1 / (1 + expf(-margin)).
+        margin = np.empty((leaf_values.shape[0], leaf_values.shape[1] + 1), dtype=np.float32)
+        margin[:, 0] = self.base_margin
+        margin[:, 1:] = leaf_values
+        margin = np.cumsum(margin, axis=1, dtype=np.float32)[:, -1]
+        p = np.float32(1) / (expf(-margin) + np.float32(1))
+        return np.vstack((1.0 - p, p)).transpose()
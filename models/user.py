@@ -2,6 +2,14 @@ from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
 from bson.objectid import ObjectId
 from utils.db import get_db
+from utils.cache import TTLCache
+from config import Config
+
+# Users by ('id', id) and ('username', username). Entries are dropped on
+# create/role change in this process; other workers and processes (e.g.
+# seed_admin.py) only reach the running workers once USER_CACHE_TTL
+# expires, so it is kept short: a revoked admin keeps access that long.
+_user_cache = TTLCache(maxsize=Config.USER_CACHE_SIZE, ttl=Config.USER_CACHE_TTL)
 
 class User(UserMixin):
     def __init__(self, user_doc):
@@ -20,20 +28,57 @@ class User(UserMixin):
     @staticmethod
     def get(user_id):
         """Get user by ID"""
-        db = get_db()
-        user_doc = db.users.find_one({'_id': ObjectId(user_id)})
-        if user_doc:
-            return User(user_doc)
-        return None
+        user = _user_cache.get(('id', user_id))
+        if user is None:
+            db = get_db()
+            user_doc = db.users.find_one({'_id': ObjectId(user_id)})
+            if not user_doc:
+                return None
+            user = User._cache(User(user_doc))
+        return user
     
     @staticmethod
     def get_by_username(username):
         """Get user by username"""
+        user = _user_cache.get(('username', username))
+        if user is None:
+            db = get_db()
+            user_doc = db.users.find_one({'username': username})
+            if not user_doc:
+                return None
+            user = User._cache(User(user_doc))
+        return user
+
+    @staticmethod
+    def _cache(user):
+        _user_cache.set(('id', user.id), user)
+        _user_cache.set(('username', user.username), user)
+        return user
+
+    @staticmethod
+    def invalidate(user_id=None, username=None):
+        """Drop a user from this process's lookup cache"""
+        cached = None
+        if user_id is not None:
+            cached = _user_cache.pop(('id', str(user_id)))
+        if username is not None:
+            cached = _user_cache.pop(('username', username)) or cached
+        if cached is not None:
+            _user_cache.pop(('id', cached.id))
+            _user_cache.pop(('username', cached.username))
+
+    @staticmethod
+    def cache_stats():
+        """Hit/miss counters of the user lookup cache"""
+        return _user_cache.stats()
+    
+    @staticmethod
+    def set_role(user_id, role):
+        """Change a user's role; returns True if the document was modified"""
         db = get_db()
-        user_doc = db.users.find_one({'username': username})
-        if user_doc:
-            return User(user_doc)
-        return None
+        result = db.users.update_one({'_id': ObjectId(user_id)}, {'$set': {'role': role}})
+        User.invalidate(user_id=user_id)
+        return bool(result.modified_count)
     
     @staticmethod
     def create_user(username, email, password, role='user'):
@@ -55,6 +100,7 @@ class User(UserMixin):
         # Insert into database
         result = db.users.insert_one(user_doc)
         user_doc['_id'] = result.inserted_id
+        User.invalidate(username=username)
         
         return User(user_doc)
     
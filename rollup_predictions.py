@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+import argparse
+from datetime import datetime, timedelta
+from utils.db import get_db, ensure_indexes
+from models.predictions import rollup_daily, day_of
+from app import create_app
+
+def main():
+    parser = argparse.ArgumentParser(description="Materialize daily prediction rollups (run e.g. hourly from cron).")
+    parser.add_argument("--days", type=int, default=2,
+                        help="recompute this many most recent days, including today")
+    args = parser.parse_args()
+
+    since = day_of(datetime.utcnow() - timedelta(days=max(args.days, 1) - 1))
+    app = create_app()
+    with app.app_context():
+        db = get_db()
+        # $merge needs the unique (day, model_name) index, which create_app
+        # only builds in the background, if at all
+        ensure_indexes(db)
+        rollup_daily(db, since)
+        print(f"✅ Rolled up predictions per day since {since}.")
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,25 @@
-from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app
+from flask import Blueprint, render_template, request, flash, redirect, url_for, current_app, jsonify
 from flask_login import login_required, current_user
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from utils.db import get_db
-from datetime import datetime
+from utils.write_behind import write_behind
+from models.audit import audit_event
+from datetime import datetime, timezone
 import uuid
-from models.diabetes_model import DiabetesPredictor
+from models.registry import get_predictor
+from models.prediction_cache import prediction_cache, predict_cached
+from models.patient_import import (
+    NAME_PATTERN, PHONE_PATTERN, EMAIL_PATTERN, IMPORT_FIELDS, ImportFileError, file_format, import_patients,
+    search_fields
+)
+from models.scoring import RISK_BANDS, score_patients, scoring_in_progress, last_scoring_run
+from models.predictions import (
+    record_prediction, daily_counts, risk_distribution, patient_trend, default_range,
+    DEFAULT_TREND_LIMIT, DAY_FORMAT
+)
 from functools import wraps
 import re
+import threading
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -32,11 +45,51 @@ def admin_required(f):
     return wrapper
 
 def validate_name(name):
-    return bool(re.fullmatch(r'[A-Za-z ]{3,}', name))
+    return bool(re.fullmatch(NAME_PATTERN, name))
 def validate_phone(phone):
-    return bool(re.fullmatch(r'\d{10,15}', phone))
+    return bool(re.fullmatch(PHONE_PATTERN, phone))
 def validate_email(email):
-    return bool(re.fullmatch(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}$', email))
+    return bool(re.fullmatch(EMAIL_PATTERN, email))
+
+# Only the fields rendered by the patient list
+DASHBOARD_PROJECTION = {
+    'name': 1, 'phone': 1, 'email': 1, 'created_at': 1,
+    'risk_percentage': 1, 'prediction': 1
+}
+DASHBOARD_SORT = [('created_at', -1), ('_id', -1)]
+
+def encode_cursor(patient):
+    """Keyset cursor for the row after which the next page starts."""
+    millis = int(patient['created_at'].replace(tzinfo=timezone.utc).timestamp() * 1000)
+    return f"{millis}.{patient['_id']}"
+
+def decode_cursor(cursor):
+    try:
+        millis, patient_id = cursor.split('.', 1)
+        created_at = datetime.fromtimestamp(int(millis) / 1000, tz=timezone.utc).replace(tzinfo=None)
+        return created_at, patient_id
+    except (ValueError, OverflowError):
+        return None
+
+def dashboard_query(search, band, cursor):
+    clauses = []
+    if search:
+        # Case-sensitive and anchored on the lowercased copies, so each
+        # index gives tight prefix bounds; name_words finds "smith" in
+        # "John Smith", name_lc a search spanning several words
+        prefix = {'$regex': '^' + re.escape(search.lower())}
+        clauses.append({'$or': [{'name_lc': prefix}, {'name_words': prefix}, {'email_lc': prefix}]})
+    if band == 'unscored':
+        clauses.append({'risk_band': None})
+    elif band in RISK_BANDS:
+        clauses.append({'risk_band': band})
+    if cursor:
+        created_at, patient_id = cursor
+        clauses.append({'$or': [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': patient_id}},
+        ]})
+    return {'$and': clauses} if clauses else {}
 
 @admin_bp.route('/', methods=['GET'])
 @jwt_required()
@@ -44,8 +97,25 @@ def validate_email(email):
 @admin_required
 def admin_dashboard():
     db = get_db()
-    patients = list(db.patients.find().sort('created_at', -1))
-    return render_template('admin_dashboard.html', patients=patients)
+    search = request.args.get('q', '').strip()
+    band = request.args.get('band', '')
+    cursor = decode_cursor(request.args.get('after', ''))
+    page_size = current_app.config['ADMIN_PAGE_SIZE']
+    # Fetch one extra row to know whether there is a next page
+    patients = list(
+        db.patients.find(dashboard_query(search, band, cursor), DASHBOARD_PROJECTION)
+        .sort(DASHBOARD_SORT)
+        .limit(page_size + 1)
+    )
+    next_cursor = None
+    if len(patients) > page_size:
+        patients = patients[:page_size]
+        next_cursor = encode_cursor(patients[-1])
+    return render_template('admin_dashboard.html', patients=patients,
+                           search=search, band=band, risk_bands=list(RISK_BANDS),
+                           next_cursor=next_cursor, is_first_page=cursor is None,
+                           last_run=last_scoring_run(db),
+                           cache_stats=prediction_cache.stats())
 
 @admin_bp.route('/add', methods=['GET', 'POST'])
 @jwt_required()
@@ -83,12 +153,15 @@ def add_patient():
             flash('All health fields must be numeric and provided.', 'error')
             return render_template('admin_add.html', name=name, phone=phone, email=email)
         try:
-            db = get_db()
-            db.patients.insert_one({
-                '_id': str(uuid.uuid4()),
+            # Written in the background; the dashboard shows it within
+            # WRITE_BEHIND_FLUSH_INTERVAL
+            patient_id = str(uuid.uuid4())
+            write_behind.insert('patients', {
+                '_id': patient_id,
                 'name': name,
                 'phone': phone,
                 'email': email,
+                **search_fields(name, email),
                 'glucose': glucose,
                 'blood_pressure': blood_pressure,
                 'skin_thickness': skin_thickness,
@@ -98,6 +171,7 @@ def add_patient():
                 'age': age,
                 'created_at': datetime.utcnow()
             })
+            audit_event('patient_added', user_id=current_user.id, patient_id=patient_id)
             flash('Patient added successfully.', 'success')
             return redirect(url_for('admin.admin_dashboard'))
         except Exception as e:
@@ -106,6 +180,62 @@ def add_patient():
             return render_template('admin_add.html', name=name, phone=phone, email=email)
     return render_template('admin_add.html')
 
+@admin_bp.route('/import', methods=['GET', 'POST'])
+@jwt_required()
+@login_required
+@admin_required
+def import_patients_file():
+    """Bulk-add patients from an uploaded CSV or Parquet file."""
+    if request.method == 'POST':
+        upload = request.files.get('file')
+        score = request.form.get('score') == '1'
+        if not upload or not upload.filename:
+            flash('Please choose a CSV or Parquet file.', 'error')
+            return render_template('admin_import.html', fields=IMPORT_FIELDS)
+        fmt = file_format(upload.filename)
+        if fmt is None:
+            flash('Unsupported file type; upload a .csv or .parquet file.', 'error')
+            return render_template('admin_import.html', fields=IMPORT_FIELDS)
+        predictor = version = None
+        if score:
+            try:
+                predictor = get_predictor()
+                version = predictor.model_version
+            except Exception as e:
+                current_app.logger.error(f"Model load error: {e}")
+                flash('Model unavailable; import without scoring or try again later.', 'error')
+                return render_template('admin_import.html', fields=IMPORT_FIELDS)
+        config = current_app.config
+        try:
+            summary = import_patients(
+                get_db(), upload.stream, fmt,
+                chunk_size=config['PATIENT_IMPORT_CHUNK_SIZE'],
+                predictor=predictor, model_version=version,
+                max_rejects=config['PATIENT_IMPORT_MAX_REJECTS']
+            )
+        except ImportFileError as e:
+            if e.summary is None:
+                flash(str(e), 'error')
+                return render_template('admin_import.html', fields=IMPORT_FIELDS)
+            # Earlier chunks are saved; say so, or a re-upload would add them twice
+            summary = e.summary
+            flash(f"Import stopped at row {summary['stopped_at_row']} ({summary['error']}). "
+                  f"{summary['imported']} rows before it were imported; upload only rows "
+                  f"{summary['stopped_at_row']} onwards to finish.", 'error')
+        except Exception as e:
+            current_app.logger.error(f"Error importing patients: {e}")
+            flash('An unexpected error occurred. Please try again.', 'error')
+            return render_template('admin_import.html', fields=IMPORT_FIELDS)
+        else:
+            flash(f"Imported {summary['imported']} of {summary['rows']} rows.",
+                  'success' if not summary['rejected'] else 'info')
+        audit_event('patients_imported', user_id=current_user.id, filename=upload.filename,
+                    rows=summary['rows'], imported=summary['imported'],
+                    rejected=summary['rejected'], scored=summary['scored'],
+                    stopped_at_row=summary.get('stopped_at_row'))
+        return render_template('admin_import.html', fields=IMPORT_FIELDS, summary=summary)
+    return render_template('admin_import.html', fields=IMPORT_FIELDS)
+
 @admin_bp.route('/predict/<patient_id>', methods=['GET'])
 @jwt_required()
 @login_required
@@ -122,7 +252,120 @@ def predict_patient(patient_id):
         patient['bmi'], patient['diabetes_pedigree'],
         patient['age']
     ]
-    predictor = DiabetesPredictor()
-    predictor.load_model()
-    result = predictor.predict(features)
+    result = predict_cached(features)
+    record_prediction(result, features, user_id=current_user.id, patient_id=patient_id,
+                      source='admin')
     return render_template('admin_predict.html', patient=patient, result=result)
+
+@admin_bp.route('/predict/<patient_id>/outcome', methods=['POST'])
+@jwt_required()
+@login_required
+@admin_required
+def label_patient(patient_id):
+    """Record a patient's confirmed diagnosis for warm-start model updates."""
+    outcome = request.form.get('outcome')
+    if outcome not in ('0', '1'):
+        flash('Please choose a confirmed outcome.', 'error')
+        return redirect(url_for('admin.predict_patient', patient_id=patient_id))
+    result = get_db().patients.update_one({'_id': patient_id}, {'$set': {
+        'outcome': int(outcome),
+        'labelled_at': datetime.utcnow(),
+        'labelled_by': current_user.id,
+    }})
+    if not result.matched_count:
+        flash('Patient not found.', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    audit_event('patient_labelled', user_id=current_user.id, patient_id=patient_id, outcome=int(outcome))
+    flash('Confirmed outcome saved.', 'success')
+    return redirect(url_for('admin.predict_patient', patient_id=patient_id))
+
+@admin_bp.route('/score-all', methods=['POST'])
+@jwt_required()
+@login_required
+@admin_required
+def score_all_patients():
+    """Start a background run that rescores stale (or, with full=1, all) patients."""
+    if scoring_in_progress():
+        flash('A scoring run is already in progress.', 'info')
+        return redirect(url_for('admin.admin_dashboard'))
+    full = request.form.get('full') == '1'
+    app = current_app._get_current_object()
+    try:
+        predictor = get_predictor()
+    except Exception as e:
+        current_app.logger.error(f"Model load error: {e}")
+        flash('Model unavailable. Please try again later.', 'error')
+        return redirect(url_for('admin.admin_dashboard'))
+    # The version of this predictor, not of whatever the registry holds by now
+    version = predictor.model_version
+
+    def run():
+        with app.app_context():
+            try:
+                summary = score_patients(get_db(), predictor, version, full=full)
+                app.logger.info(f"Scoring run finished: {summary['scored']} scored, "
+                                f"{summary['skipped']} skipped")
+            except Exception as e:
+                app.logger.error(f"Scoring run failed: {e}")
+
+    threading.Thread(target=run, daemon=True, name='score-patients').start()
+    audit_event('scoring_started', user_id=current_user.id, full=full, model_version=version)
+    flash('Scoring started. Results will appear as patients are scored.', 'success')
+    return redirect(url_for('admin.admin_dashboard'))
+
+# -----------------------
+# Prediction reports (JSON)
+# -----------------------
+DAY_RE = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+def report_range():
+    """?start=YYYY-MM-DD&end=YYYY-MM-DD, defaulting to the last 30 days.
+
+    Raises ValueError for invalid dates, start after end, or a range longer
+    than REPORT_MAX_DAYS (past days missing a rollup are queried one by one).
+    """
+    start, end = default_range()
+    start = request.args.get('start', start)
+    end = request.args.get('end', end)
+    try:
+        if not (DAY_RE.fullmatch(start) and DAY_RE.fullmatch(end)):
+            raise ValueError
+        days = (datetime.strptime(end, DAY_FORMAT) - datetime.strptime(start, DAY_FORMAT)).days + 1
+    except ValueError:
+        raise ValueError("start and end must be dates as YYYY-MM-DD")
+    if days < 1:
+        raise ValueError("start must not be after end")
+    max_days = current_app.config.get('REPORT_MAX_DAYS', 366)
+    if days > max_days:
+        raise ValueError(f"The range may span at most {max_days} days")
+    return start, end
+
+@admin_bp.route('/reports/risk-distribution', methods=['GET'])
+@jwt_required()
+@login_required
+@admin_required
+def report_risk_distribution():
+    try:
+        start, end = report_range()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(start=start, end=end, **risk_distribution(get_db(), start, end))
+
+@admin_bp.route('/reports/daily', methods=['GET'])
+@jwt_required()
+@login_required
+@admin_required
+def report_daily_counts():
+    try:
+        start, end = report_range()
+    except ValueError as e:
+        return jsonify(error=str(e)), 400
+    return jsonify(start=start, end=end, days=daily_counts(get_db(), start, end))
+
+@admin_bp.route('/reports/patients/<patient_id>/trend', methods=['GET'])
+@jwt_required()
+@login_required
+@admin_required
+def report_patient_trend(patient_id):
+    limit = min(max(request.args.get('limit', DEFAULT_TREND_LIMIT, type=int), 1), 1000)
+    return jsonify(patient_id=patient_id, predictions=patient_trend(get_db(), patient_id, limit))
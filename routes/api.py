@@ -0,0 +1,118 @@
+from flask import Blueprint, Response, request, current_app, stream_with_context, jsonify
+from flask_jwt_extended import jwt_required
+from models.features import INPUT_FIELDS
+from models.registry import get_predictor
+from utils.streaming import iter_json_records
+import numpy as np
+import json
+import math
+
+api_bp = Blueprint('api', __name__)
+
+NDJSON_TYPES = ('application/x-ndjson', 'application/ndjson', 'application/jsonl')
+
+
+# -----------------------
+# Helper: Record parsing
+# -----------------------
+def record_features(record):
+    """Return the 7 model inputs of a record as floats.
+
+    A record is either an object keyed by the form field names or a list of
+    the 7 values in model order.
+    """
+    if isinstance(record, dict):
+        missing = [f for f in INPUT_FIELDS if f not in record]
+        if missing:
+            raise ValueError(f"Missing field(s): {', '.join(missing)}")
+        values = [record[f] for f in INPUT_FIELDS]
+    elif isinstance(record, list):
+        if len(record) != len(INPUT_FIELDS):
+            raise ValueError(f"Expected {len(INPUT_FIELDS)} values, got {len(record)}")
+        values = record
+    else:
+        raise ValueError("Record must be an object or an array")
+    try:
+        features = [float(v) for v in values]
+    except (TypeError, ValueError):
+        raise ValueError("All health fields must be valid numbers.")
+    # float() also accepts "nan", "inf" and JSON NaN/Infinity
+    if not all(math.isfinite(v) for v in features):
+        raise ValueError("All health fields must be valid numbers.")
+    return features
+
+
+def score_chunk(predictor, X, meta):
+    """Score a filled chunk and return its NDJSON lines as one string."""
+    lines = []
+    if len(X):
+        result = predictor.predict_batch(X)
+        columns = zip(
+            result['prediction'].tolist(),
+            result['risk_percentage'].tolist(),
+            result['confidence'].tolist()
+        )
+    else:
+        columns = iter(())
+    for index, record_id, error in meta:
+        out = {'index': index}
+        if record_id is not None:
+            out['id'] = record_id
+        if error:
+            out['error'] = error
+        else:
+            prediction, risk, confidence = next(columns)
+            out.update(prediction=prediction, risk_percentage=risk,
+                       confidence=confidence, model_used=result['model_used'])
+        lines.append(json.dumps(out))
+    return '\n'.join(lines) + '\n' if lines else ''
+
+
+# -----------------------
+# Bulk scoring
+# -----------------------
+@api_bp.route('/predict', methods=['POST'])
+@jwt_required()
+def predict():
+    """Score a JSON array or NDJSON body and stream NDJSON results.
+
+    Each output line carries the record's position ('index'), its 'id' when
+    one was supplied, and either the prediction fields or an 'error'.
+    """
+    try:
+        predictor = get_predictor()
+    except Exception as e:
+        current_app.logger.error(f"Model load error: {e}")
+        return jsonify(error="Model unavailable"), 503
+
+    chunk_size = current_app.config['API_PREDICT_CHUNK_SIZE']
+    max_record_size = current_app.config['API_MAX_RECORD_SIZE']
+    as_array = request.mimetype not in NDJSON_TYPES
+    stream = request.stream
+
+    def generate():
+        X = np.empty((chunk_size, len(INPUT_FIELDS)), dtype=np.float64)
+        filled, meta = 0, []
+        records = iter_json_records(stream, array=as_array, max_record_size=max_record_size)
+        try:
+            for index, record in enumerate(records):
+                record_id = record.get('id') if isinstance(record, dict) else None
+                try:
+                    X[filled] = record_features(record)
+                    filled += 1
+                    meta.append((index, record_id, None))
+                except ValueError as e:
+                    meta.append((index, record_id, str(e)))
+                if filled == chunk_size or len(meta) >= 2 * chunk_size:
+                    yield score_chunk(predictor, X[:filled], meta)
+                    filled, meta = 0, []
+            yield score_chunk(predictor, X[:filled], meta)
+        except ValueError as e:
+            # The body is malformed past this point; flush what was parsed.
+            yield score_chunk(predictor, X[:filled], meta)
+            yield json.dumps({'error': str(e)}) + '\n'
+        except Exception as e:
+            current_app.logger.error(f"Bulk prediction error: {e}")
+            yield json.dumps({'error': "Prediction failed"}) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -2,15 +2,18 @@ from flask import (
     Blueprint, render_template, request, redirect, url_for,
     flash, current_app, make_response, jsonify
 )
-from flask_login import login_user, logout_user, login_required
+from flask_login import login_user, logout_user, login_required, current_user
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
     set_access_cookies, set_refresh_cookies, unset_jwt_cookies,
     jwt_required, get_jwt_identity
 )
 from models.user import User
+from models.audit import audit_event
 from utils.db import get_db
-import requests, re
+from utils.captcha import captcha, CaptchaUnavailable
+from utils.rate_limit import limiter
+import re
 
 auth_bp = Blueprint("auth", __name__)
 
@@ -58,12 +61,26 @@ def validate_password(password: str):
         return False, "Password must contain a special character."
     return True, ""
 
+# -----------------------
+# Helper: Throttling
+# -----------------------
+def throttled(template: str, retry_after: int):
+    flash(f"Too many attempts. Please try again in {retry_after} seconds.", "error")
+    response = make_response(render_template(template), 429)
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
 # -----------------------
 # Registration
 # -----------------------
 @auth_bp.route("/register", methods=["GET", "POST"])
 def register():
     if request.method == "POST":
+        # Rate limit before any validation, database or hashing work
+        wait = limiter.hit("register_ip", request.remote_addr)
+        if wait:
+            return throttled("register.html", wait)
+
         username = sanitize(request.form.get("username"))
         email = sanitize(request.form.get("email"))
         password = request.form.get("password", "")
@@ -105,6 +122,7 @@ def register():
         # Create user
         user = User.create_user(username, email, password, role="user")
         if user:
+            audit_event("user_registered", user_id=user.id, username=username)
             flash("Registration successful! Please log in.", "success")
             return redirect(url_for("auth.login"))
 
@@ -119,6 +137,11 @@ def register():
 @auth_bp.route("/login", methods=["GET", "POST"])
 def login():
     if request.method == "POST":
+        # Rate limit before any validation, database or hashing work
+        wait = limiter.hit("login_ip", request.remote_addr)
+        if wait:
+            return throttled("login.html", wait)
+
         username = sanitize(request.form.get("username"))
         password = request.form.get("password", "")
         token = request.form.get("g-recaptcha-response", "")
@@ -133,31 +156,30 @@ def login():
         if not (3 <= len(username) <= 20):
             flash("Invalid username format.", "error"); return render_template("login.html")
 
-        # Credential check
-        user = User.get_by_username(username)
-        if not user or not user.check_password(password):
-            flash("Invalid username or password.", "error"); return render_template("login.html")
+        # Only failed attempts count against a username; checked before any work
+        wait = limiter.check("login_username", username.lower())
+        if wait:
+            return throttled("login.html", wait)
 
-        # reCAPTCHA
-        if not token:
+        # reCAPTCHA first: it is cheap for us, password hashing is not
+        if captcha.required and not token:
             flash("Please complete the reCAPTCHA.", "error"); return render_template("login.html")
         try:
-            resp = requests.post(
-                "https://www.google.com/recaptcha/api/siteverify",
-                data={
-                    "secret": current_app.config["RECAPTCHA_PRIVATE_KEY"],
-                    "response": token
-                },
-                timeout=10
-            )
-            data = resp.json()
-            if resp.status_code != 200 or not data.get("success"):
+            if not captcha.verify(token, request.remote_addr):
                 flash("reCAPTCHA failed. Try again.", "error"); return render_template("login.html")
-        except requests.RequestException:
+        except CaptchaUnavailable:
             flash("reCAPTCHA verification error.", "error"); return render_template("login.html")
 
+        # Credential check
+        user = User.get_by_username(username)
+        if not user or not user.check_password(password):
+            audit_event("login_failed", user_id=user.id if user else None, username=username)
+            limiter.hit("login_username", username.lower())
+            flash("Invalid username or password.", "error"); return render_template("login.html")
+
         # Log in & issue JWT
         login_user(user)
+        audit_event("login", user_id=user.id, username=username)
         access = create_access_token(identity=user.id)
         refresh = create_refresh_token(identity=user.id)
         response = make_response(redirect(url_for("dashboard")))
@@ -175,6 +197,7 @@ def login():
 @auth_bp.route("/logout")
 @login_required
 def logout():
+    audit_event("logout", user_id=current_user.id)
     logout_user()
     response = make_response(redirect(url_for("auth.login")))
     unset_jwt_cookies(response)
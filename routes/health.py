@@ -0,0 +1,35 @@
+import os
+from flask import Blueprint, jsonify
+from models.registry import model_registry
+
+health_bp = Blueprint('health', __name__)
+
+# -----------------------
+# Liveness: the worker answers requests
+# -----------------------
+@health_bp.route('/healthz', methods=['GET'])
+def healthz():
+    return jsonify(status='ok', pid=os.getpid())
+
+# -----------------------
+# Readiness: the worker can serve predictions
+# -----------------------
+@health_bp.route('/readyz', methods=['GET'])
+def readyz():
+    error = None
+    if not model_registry.is_loaded:
+        # Preloaded by the gunicorn master; the development server loads on first use
+        try:
+            model_registry.get()
+        except Exception as e:
+            error = str(e)
+    body = {
+        'status': 'ready' if model_registry.is_loaded else 'unavailable',
+        'pid': os.getpid(),
+        'model_loaded': model_registry.is_loaded,
+        'model_name': model_registry.model_name,
+        'model_version': model_registry.version,
+        'load_count': model_registry.load_count,
+        'last_error': error or model_registry.last_error,
+    }
+    return jsonify(body), 200 if model_registry.is_loaded else 503
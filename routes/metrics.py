@@ -0,0 +1,105 @@
+import hmac
+import time
+from flask import Blueprint, Response, request, current_app, g, abort
+from utils.metrics import metrics, CONTENT_TYPE
+from utils.write_behind import write_behind
+from models.registry import model_registry
+from models.prediction_cache import prediction_cache
+from models.user import User
+
+metrics_bp = Blueprint('metrics', __name__)
+
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint, method and status.',
+    ['endpoint', 'method', 'status']
+)
+
+# -----------------------
+# Request timing
+# -----------------------
+def start_timer():
+    g.request_started = time.perf_counter()
+
+def remember_status(response):
+    g.response_status = response.status_code
+    return response
+
+def observe_request(exc):
+    started = g.pop('request_started', None)
+    if started is None:
+        return
+    # Unhandled exceptions never reach after_request
+    status = 500 if exc is not None else g.pop('response_status', 500)
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                 request.endpoint or 'unmatched', request.method, str(status))
+
+# -----------------------
+# Collectors for values counted elsewhere
+# -----------------------
+def collect_prediction_cache():
+    stats = prediction_cache.stats()
+    local = stats['local']
+    hits = [({'tier': 'local'}, local['hits'])]
+    misses = [({'tier': 'local'}, local['misses'])]
+    if 'shared' in stats:
+        hits.append(({'tier': 'shared'}, stats['shared']['hits']))
+        misses.append(({'tier': 'shared'}, stats['shared']['misses']))
+    return [
+        ('prediction_cache_hits_total', 'counter', 'Prediction cache hits by tier.', hits),
+        ('prediction_cache_misses_total', 'counter', 'Prediction cache misses by tier.', misses),
+        ('prediction_cache_entries', 'gauge', 'Entries in the per-process prediction cache.',
+         [({}, local['size'])]),
+    ]
+
+def collect_write_behind():
+    stats = write_behind.stats()
+    counters = [
+        (f'write_behind_{name}_total', 'counter', f'Write-behind queue: {name.replace("_", " ")}.',
+         [({}, stats[name])])
+        for name in ('enqueued', 'written', 'batches', 'failed_batches', 'overflow', 'spilled', 'replayed',
+                     'bad_files')
+    ]
+    return counters + [
+        ('write_behind_pending', 'gauge', 'Documents waiting in the write-behind queue.',
+         [({}, stats['pending'])]),
+        ('write_behind_max_pending', 'gauge', 'Capacity of the write-behind queue.',
+         [({}, stats['max_pending'])]),
+    ]
+
+def collect_user_cache():
+    stats = User.cache_stats()
+    return [
+        ('user_cache_hits_total', 'counter', 'User lookup cache hits.', [({}, stats['hits'])]),
+        ('user_cache_misses_total', 'counter', 'User lookup cache misses.', [({}, stats['misses'])]),
+        ('user_cache_evictions_total', 'counter', 'User lookup cache evictions.', [({}, stats['evictions'])]),
+        ('user_cache_entries', 'gauge', 'Entries in the per-process user lookup cache.', [({}, stats['size'])]),
+    ]
+
+def collect_model():
+    samples = []
+    if model_registry.is_loaded:
+        samples.append(({'model_name': model_registry.model_name, 'version': model_registry.version}, 1))
+    return [('model_info', 'gauge', 'The model served by this worker.', samples)]
+
+def init_app(app):
+    """Time every request and export the collectors; /metrics is served by metrics_bp."""
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+    app.before_request(start_timer)
+    app.after_request(remember_status)
+    app.teardown_request(observe_request)
+    for collector in (collect_prediction_cache, collect_write_behind, collect_user_cache, collect_model):
+        metrics.register_collector(collector)
+    app.register_blueprint(metrics_bp)
+
+# -----------------------
+# Endpoint
+# -----------------------
+@metrics_bp.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+            abort(401)
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
@@ -0,0 +1,28 @@
+#!/usr/bin/env python3
+import argparse
+from utils.db import get_db
+from models.registry import model_registry
+from models.scoring import score_patients, DEFAULT_BATCH_SIZE
+from app import create_app
+
+def main():
+    parser = argparse.ArgumentParser(description="Score patients and store the results.")
+    parser.add_argument("--full", action="store_true",
+                        help="rescore every patient, not only new/changed ones")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        predictor = model_registry.get()
+        summary = score_patients(
+            get_db(), predictor, predictor.model_version,
+            batch_size=args.batch_size, full=args.full
+        )
+        elapsed = (summary["finished_at"] - summary["started_at"]).total_seconds()
+        print(f"✅ Scored {summary['scored']} patients with {summary['model_name']} "
+              f"(version {summary['model_version']}) in {elapsed:.1f}s, "
+              f"skipped {summary['skipped']} with incomplete data (marked with score_error).")
+
+if __name__ == "__main__":
+    main()
@@ -21,11 +21,7 @@ def main():
         existing = db.users.find_one({ "username": admin_username })
         if existing:
             # Promote existing user to admin
-            result = db.users.update_one(
-                { "_id": existing["_id"] },
-                { "$set": { "role": "admin" } }
-            )
-            if result.modified_count:
+            if User.set_role(existing["_id"], "admin"):
                 print(f"✅ User '{admin_username}' promoted to admin.")
             else:
                 print(f"ℹ️ User '{admin_username}' was already an admin.")
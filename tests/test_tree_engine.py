@@ -0,0 +1,97 @@
+"""The NumPy tree engine must return exactly what the original model returns.
+
+Each model is fitted on data/diabetes.csv the way train_model prepares it,
+and the engine (fed unscaled features, with the scaling folded into its
+thresholds) is compared bit for bit with ``model.predict_proba`` on scaled
+features, on the dataset itself and on random and rounded inputs.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from sklearn.ensemble import ExtraTreesClassifier, RandomForestClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from models.features import RAW_FEATURES, FeaturePipeline
+from models.tree_engine import TreeEnsembleEngine
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'diabetes.csv')
+
+
+@pytest.fixture(scope='module')
+def dataset():
+    df = pd.read_csv(DATA_PATH)
+    raw = df[RAW_FEATURES].to_numpy(dtype=np.float64)
+    pipeline = FeaturePipeline().fit([df[RAW_FEATURES]])
+    X = pipeline.transform(raw)
+    y = df['Outcome'].to_numpy()
+    scaler = StandardScaler().fit(X)
+    return raw, X, y, pipeline, scaler
+
+
+def scaled(X, scaler):
+    # Same arithmetic as InferencePipeline
+    X = np.array(X, dtype=np.float64)
+    X -= scaler.mean_
+    X /= scaler.scale_
+    return X
+
+
+def inputs(raw, pipeline):
+    """Dataset rows, random inputs and random inputs rounded like real entries."""
+    rng = np.random.default_rng(0)
+    mean, std = raw.mean(axis=0), raw.std(axis=0)
+    random = np.abs(rng.normal(mean, 2 * std, size=(2000, raw.shape[1])))
+    rounded = random.copy()
+    for i, decimals in enumerate((0, 1, 2, 3)):
+        rounded[i::4] = np.round(rounded[i::4], decimals)
+    return {
+        'dataset': pipeline.transform(raw),
+        'random': pipeline.transform(random),
+        'rounded': pipeline.transform(rounded),
+    }
+
+
+def fitted(name, X, y):
+    if name == 'RandomForest':
+        return RandomForestClassifier(n_estimators=100, random_state=42, n_jobs=1).fit(X, y)
+    if name == 'ExtraTrees':
+        return ExtraTreesClassifier(n_estimators=100, random_state=42, n_jobs=1).fit(X, y)
+    if name == 'XGBoost':
+        return xgb.XGBClassifier(random_state=42, eval_metric='logloss').fit(X, y)
+    if name == 'XGBoostEarlyStopped':
+        X_train, X_val, y_train, y_val = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+        model = xgb.XGBClassifier(n_estimators=500, learning_rate=0.1, early_stopping_rounds=10,
+                                  random_state=42, eval_metric='logloss')
+        model.fit(X_train, y_train, eval_set=[(X_val, y_val)], verbose=False)
+        assert model.best_iteration < 499
+        return model
+    raise ValueError(name)
+
+
+@pytest.mark.parametrize('name', ['RandomForest', 'ExtraTrees', 'XGBoost', 'XGBoostEarlyStopped'])
+def test_engine_matches_model(dataset, name):
+    raw, X, y, pipeline, scaler = dataset
+    model = fitted(name, scaled(X, scaler), y)
+    engine = TreeEnsembleEngine.from_model(model, scaler.mean_, scaler.scale_)
+    assert engine is not None
+    # Serving loads the engine from engine.npz without the model
+    reloaded = TreeEnsembleEngine.from_arrays(engine.to_arrays())
+    for label, features in inputs(raw, pipeline).items():
+        expected = model.predict_proba(scaled(features, scaler))
+        assert np.array_equal(engine.predict_proba(features), expected), label
+        assert np.array_equal(reloaded.predict_proba(features), expected), label
+        # Single rows, as the web form scores them
+        for row in features[:50]:
+            assert np.array_equal(engine.predict_proba(row[None, :]),
+                                  model.predict_proba(scaled(row[None, :], scaler))), label
+
+
+def test_unsupported_model_has_no_engine(dataset):
+    from sklearn.linear_model import LogisticRegression
+    _, X, y, _, scaler = dataset
+    model = LogisticRegression().fit(scaled(X, scaler), y)
+    assert TreeEnsembleEngine.from_model(model, scaler.mean_, scaler.scale_) is None
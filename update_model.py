@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+import argparse
+from utils.db import get_db
+from models.artifact import default_model_path, is_artifact_path
+from models.model_update import (
+    update_model, DEFAULT_MIN_ROWS, DEFAULT_HOLDOUT_SIZE, DEFAULT_EXTRA_ROUNDS,
+    DEFAULT_EXTRA_TREES, DEFAULT_TOLERANCE
+)
+from models.diabetes_model import DEFAULT_DATA_PATH, DATA_CHUNK_SIZE
+from app import create_app
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Continue training the current model on newly labelled patients.")
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH,
+                        help="the model's training CSV; its test split is part of the held-out set")
+    parser.add_argument("--chunk-size", type=int, default=DATA_CHUNK_SIZE,
+                        help="rows read at a time from the training CSV")
+    parser.add_argument("--min-rows", type=int, default=DEFAULT_MIN_ROWS,
+                        help="skip the update below this many new labels")
+    parser.add_argument("--holdout", type=float, default=DEFAULT_HOLDOUT_SIZE,
+                        help="share of the new labels held out for evaluation")
+    parser.add_argument("--extra-rounds", type=int, default=DEFAULT_EXTRA_ROUNDS,
+                        help="boosting rounds added to an XGBoost model")
+    parser.add_argument("--extra-trees", type=int, default=DEFAULT_EXTRA_TREES,
+                        help="trees added to a RandomForest model")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed drop in held-out F1/accuracy")
+    parser.add_argument("--dry-run", action="store_true", help="evaluate but do not publish")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        artifact_root = app.config.get("MODEL_PATH") or default_model_path()
+        if not is_artifact_path(artifact_root):
+            print(f"❌ {artifact_root} is not a model artifact; train with models/diabetes_model.py first.")
+            return
+        summary = update_model(
+            get_db(), artifact_root, args.data, min_rows=args.min_rows,
+            holdout_size=args.holdout, extra_rounds=args.extra_rounds,
+            extra_trees=args.extra_trees, tolerance=args.tolerance, dry_run=args.dry_run,
+            chunksize=args.chunk_size
+        )
+        if summary["status"] == "no_data":
+            print(f"ℹ️  {summary['labelled_rows']} new labels since {summary['since']}; "
+                  f"need {args.min_rows}. Nothing to do.")
+            return
+        if summary["status"] == "insufficient_classes":
+            print(f"ℹ️  {summary['reason']} among {summary['trained_rows']} new training rows. Nothing to do.")
+            return
+        if "reason" in summary:
+            print(f"❌ Not updated: {summary['reason']}.")
+            return
+        before, after = summary["metrics_before"], summary["metrics_after"]
+        print(f"Trained {summary['model_name']} ({summary['base_version']}) on "
+              f"{summary['trained_rows']} new rows, held out {summary['holdout_rows']}.")
+        print(f"  F1:       {before['f1']:.4f} -> {after['f1']:.4f}")
+        print(f"  Accuracy: {before['accuracy']:.4f} -> {after['accuracy']:.4f}")
+        if summary["status"] == "rejected":
+            print(f"⚠️  Not published: {', '.join(summary['regressed'])} regressed.")
+        elif summary["status"] == "dry_run":
+            print("✅ No regression (dry run, not published).")
+        else:
+            print(f"✅ Published version {summary['version']}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Keeps hit/miss/eviction counters for monitoring.
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires, value = entry
+                if expires > now:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
+
+
+class SQLiteCache:
+    """LRU cache with expiry in a SQLite file, shared by every process using it.
+
+    Values must be JSON-serializable. Each thread (and each process after a
+    fork) opens its own connection; the database runs in WAL mode so readers
+    do not block the writer. Expired and least recently used entries are
+    trimmed every ``trim_every`` writes rather than on each one.
+    """
+
+    def __init__(self, path, maxsize=100000, ttl=3600.0, timeout=1.0, trim_every=256):
+        self.path = path
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timeout = timeout
+        self.trim_every = trim_every
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' key TEXT PRIMARY KEY, value TEXT NOT NULL,'
+                ' expires REAL NOT NULL, accessed REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed)')
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key, default=None):
+        # Wall-clock time, since entries are shared between processes
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute('SELECT value FROM cache WHERE key = ? AND expires > ?',
+                           (key, now)).fetchone()
+        if row is None:
+            self._count(False)
+            return default
+        conn.execute('UPDATE cache SET accessed = ? WHERE key = ?', (now, key))
+        self._count(True)
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        now = time.time()
+        conn = self._connection()
+        conn.execute('INSERT OR REPLACE INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                     (key, json.dumps(value), now + self.ttl, now))
+        with self._counter_lock:
+            self._writes += 1
+            trim = self._writes % self.trim_every == 0
+        if trim:
+            self.trim()
+
+    def trim(self):
+        conn = self._connection()
+        conn.execute('DELETE FROM cache WHERE expires <= ?', (time.time(),))
+        conn.execute(
+            'DELETE FROM cache WHERE key IN ('
+            ' SELECT key FROM cache ORDER BY accessed DESC LIMIT -1 OFFSET ?)',
+            (self.maxsize,)
+        )
+
+    def pop(self, key):
+        conn = self._connection()
+        row = conn.execute('SELECT value FROM cache WHERE key = ?', (key,)).fetchone()
+        conn.execute('DELETE FROM cache WHERE key = ?', (key,))
+        return json.loads(row[0]) if row is not None else None
+
+    def clear(self):
+        self._connection().execute('DELETE FROM cache')
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM cache').fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,160 @@
+"""CAPTCHA verification for the login form.
+
+``captcha.verify(token, remote_ip)`` checks a widget response with the
+configured backend (``CAPTCHA_BACKEND``):
+
+- ``recaptcha``: Google's siteverify API, through one pooled keep-alive
+  ``requests.Session`` per process and a short timeout;
+- ``stub``: accepts any non-empty token except ``"fail"``, without network
+  access, for tests and offline environments;
+- ``disabled``: accepts everything.
+
+Other backends can be added to ``BACKENDS``; a backend is any class with
+``verify(token, remote_ip)`` returning True or False and raising
+CaptchaUnavailable when it cannot decide, and a ``single_use`` flag.
+
+Tokens of ``single_use`` backends (reCAPTCHA) are remembered for ``ttl``
+seconds (a reCAPTCHA token's lifetime) once verified and rejected if they
+come back, without another round trip. Bots replaying a token during a
+flood are turned away locally. The stub form submits the same token every
+time, so it is not remembered.
+"""
+import hashlib
+import logging
+import os
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.cache import TTLCache
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CAPTCHA_VERIFICATIONS = metrics.counter(
+    'captcha_verifications_total', 'CAPTCHA checks by result (passed, failed, replayed, error).', ['result']
+)
+CAPTCHA_VERIFY_SECONDS = metrics.histogram(
+    'captcha_verify_seconds', 'CAPTCHA backend round trips.', ['backend']
+)
+
+RECAPTCHA_VERIFY_URL = "https://www.google.com/recaptcha/api/siteverify"
+
+
+class CaptchaUnavailable(Exception):
+    """The backend could not be reached or gave an unusable answer."""
+
+
+class RecaptchaVerifier:
+    name = 'recaptcha'
+    single_use = True
+
+    def __init__(self, secret, timeout=3.0, pool_size=10, url=RECAPTCHA_VERIFY_URL):
+        self.secret = secret
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.url = url
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def session(self):
+        # One connection pool per process; sockets are not shared across fork
+        if self._session is None or self._pid != os.getpid():
+            with self._lock:
+                if self._session is None or self._pid != os.getpid():
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('https://', adapter)
+                    session.mount('http://', adapter)
+                    self._session, self._pid = session, os.getpid()
+        return self._session
+
+    def verify(self, token, remote_ip=None):
+        data = {'secret': self.secret, 'response': token}
+        if remote_ip:
+            data['remoteip'] = remote_ip
+        try:
+            resp = self.session().post(self.url, data=data, timeout=self.timeout)
+            resp.raise_for_status()
+            return bool(resp.json().get('success'))
+        except (requests.RequestException, ValueError) as e:
+            raise CaptchaUnavailable(str(e)) from e
+
+
+class StubVerifier:
+    name = 'stub'
+    single_use = False
+
+    def __init__(self, **kwargs):
+        pass
+
+    def verify(self, token, remote_ip=None):
+        return token != 'fail'
+
+
+class DisabledVerifier(StubVerifier):
+    name = 'disabled'
+
+    def verify(self, token, remote_ip=None):
+        return True
+
+
+BACKENDS = {
+    'recaptcha': RecaptchaVerifier,
+    'stub': StubVerifier,
+    'disabled': DisabledVerifier,
+}
+
+
+class Captcha:
+    def __init__(self, backend=None, cache_size=10000, ttl=120.0):
+        self.backend = backend or StubVerifier()
+        self.seen = TTLCache(cache_size, ttl)
+
+    def init_app(self, app):
+        config = app.config
+        name = config.get('CAPTCHA_BACKEND', 'recaptcha')
+        if name not in BACKENDS:
+            raise ValueError(f"Unknown CAPTCHA_BACKEND {name!r}; expected one of {', '.join(BACKENDS)}")
+        self.backend = BACKENDS[name](
+            secret=config.get('RECAPTCHA_PRIVATE_KEY'),
+            timeout=config.get('CAPTCHA_TIMEOUT', 3.0),
+            pool_size=config.get('CAPTCHA_POOL_SIZE', 10),
+        )
+        self.seen = TTLCache(config.get('CAPTCHA_CACHE_SIZE', 10000), config.get('CAPTCHA_CACHE_TTL', 120.0))
+        app.extensions['captcha'] = self
+
+    @property
+    def required(self):
+        """Whether the form must carry a token at all."""
+        return self.backend.name != 'disabled'
+
+    def verify(self, token, remote_ip=None):
+        """True if ``token`` passes; raises CaptchaUnavailable if the backend cannot tell."""
+        if not self.required:
+            return True
+        if not token:
+            CAPTCHA_VERIFICATIONS.inc('failed')
+            return False
+        single_use = getattr(self.backend, 'single_use', True)
+        key = hashlib.sha256(token.encode()).hexdigest()
+        if single_use and self.seen.get(key) is not None:
+            CAPTCHA_VERIFICATIONS.inc('replayed')
+            return False
+        try:
+            with CAPTCHA_VERIFY_SECONDS.time(self.backend.name):
+                ok = self.backend.verify(token, remote_ip)
+        except CaptchaUnavailable as e:
+            CAPTCHA_VERIFICATIONS.inc('error')
+            logger.warning("CAPTCHA verification unavailable: %s", e)
+            raise
+        # Not remembered when the backend failed, so the user can retry
+        if single_use:
+            self.seen.set(key, True)
+        CAPTCHA_VERIFICATIONS.inc('passed' if ok else 'failed')
+        return ok
+
+
+captcha = Captcha()
@@ -1,17 +1,115 @@
-from flask import current_app, g
-from pymongo import MongoClient
+import os
+import threading
+from flask import current_app
+from pymongo import MongoClient, ASCENDING, DESCENDING, monitoring
+from utils.metrics import metrics
+
+MONGO_COMMAND_SECONDS = metrics.histogram(
+    'mongo_command_seconds', 'MongoDB command round trips by command and result.', ['command', 'result']
+)
+
+# Indexes backing the admin dashboard, user lookups and prediction reports;
+# an entry is a key list or a (key list, create_index options) tuple
+INDEXES = {
+    'patients': [
+        [('created_at', DESCENDING), ('_id', DESCENDING)],
+        [('risk_band', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)],
+        # Dashboard prefix search on lowercased copies of name, its words
+        # (multikey) and email
+        [('name_lc', ASCENDING)],
+        [('name_words', ASCENDING)],
+        [('email_lc', ASCENDING)],
+        # Newly labelled patients for warm-start model updates
+        [('labelled_at', ASCENDING)],
+    ],
+    'users': [
+        [('username', ASCENDING)],
+        [('email', ASCENDING)],
+    ],
+    'scoring_runs': [
+        [('finished_at', DESCENDING)],
+    ],
+    'model_updates': [
+        [('finished_at', DESCENDING)],
+    ],
+    'predictions': [
+        [('patient_id', ASCENDING), ('created_at', DESCENDING)],
+        [('user_id', ASCENDING), ('created_at', DESCENDING)],
+        [('day', ASCENDING), ('model_name', ASCENDING)],
+    ],
+    'audit_events': [
+        [('created_at', DESCENDING)],
+        [('user_id', ASCENDING), ('created_at', DESCENDING)],
+        [('event', ASCENDING), ('created_at', DESCENDING)],
+    ],
+    # $merge target of the daily rollups; 'on' fields need a unique index
+    'prediction_daily': [
+        ([('day', ASCENDING), ('model_name', ASCENDING)], {'unique': True}),
+    ],
+}
+
+class CommandTimer(monitoring.CommandListener):
+    """Feeds MONGO_COMMAND_SECONDS from pymongo's command monitoring events"""
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, 'success')
+
+    def failed(self, event):
+        MONGO_COMMAND_SECONDS.observe(event.duration_micros / 1e6, event.command_name, 'failure')
+
+# One pooled client per worker process, created lazily after fork
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+def _forget_client():
+    """Drop the parent's client in a forked child; sockets are not fork-safe"""
+    global _client, _client_pid, _client_lock
+    _client, _client_pid = None, None
+    _client_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_forget_client)
+
+def get_client():
+    """Get the shared MongoClient of this process, creating it on first use"""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                config = current_app.config
+                _client = MongoClient(
+                    config['MONGODB_URI'],
+                    maxPoolSize=config['MONGO_MAX_POOL_SIZE'],
+                    minPoolSize=config['MONGO_MIN_POOL_SIZE'],
+                    maxIdleTimeMS=config['MONGO_MAX_IDLE_TIME_MS'],
+                    waitQueueTimeoutMS=config['MONGO_WAIT_QUEUE_TIMEOUT_MS'],
+                    connectTimeoutMS=config['MONGO_CONNECT_TIMEOUT_MS'],
+                    serverSelectionTimeoutMS=config['MONGO_SERVER_SELECTION_TIMEOUT_MS'],
+                    socketTimeoutMS=config['MONGO_SOCKET_TIMEOUT_MS'],
+                    event_listeners=[CommandTimer()],
+                    connect=False
+                )
+                _client_pid = os.getpid()
+    return _client
 
 def get_db():
-    """Get database connection"""
-    if 'mongo_client' not in g:
-        uri = current_app.config['MONGODB_URI']
-        client = MongoClient(uri)
-        g.mongo_client = client
-
-    return g.mongo_client[current_app.config['DB_NAME']]
-
-def close_db(e=None):
-    """Close database connection"""
-    client = g.pop('mongo_client', None)
-    if client is not None:
-        client.close()
+    """Get database handle backed by the shared connection pool"""
+    return get_client()[current_app.config['DB_NAME']]
+
+def close_client():
+    """Close the shared client (process shutdown only)"""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client, _client_pid = None, None
+
+def ensure_indexes(db):
+    """Create the indexes in INDEXES (no-op for ones that already exist)"""
+    for collection, specs in INDEXES.items():
+        for spec in specs:
+            keys, options = spec if isinstance(spec, tuple) else (spec, {})
+            db[collection].create_index(keys, **options)
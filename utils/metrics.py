@@ -0,0 +1,243 @@
+"""In-process counters and histograms, exported in the Prometheus text format.
+
+Recording is lock-free: every metric keeps one shard of cells per thread, and
+a thread only ever writes to its own shard, so ``inc``/``observe`` are a
+dict lookup and a few list updates under the GIL. A scrape (``render``) adds
+the shards up. Values are per worker process; each gunicorn worker answers
+/metrics with its own numbers, like the cache statistics on the dashboard.
+
+Values that other components already count (cache hits, write-behind
+queue, model loads) are read at scrape time through collectors registered
+with ``metrics.register_collector`` instead of being counted twice.
+"""
+from bisect import bisect_left
+import os
+import threading
+import time
+
+# Latency buckets in seconds, from 100 µs to 10 s
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        # Cells of threads that have exited, folded together
+        self._retired = {}
+        self._shards_lock = threading.Lock()
+
+    def _shard(self):
+        try:
+            return self._local.shard
+        except AttributeError:
+            # First use by this thread; the only time a lock is taken
+            shard = {}
+            with self._shards_lock:
+                self._retire_finished()
+                self._shards.append((threading.current_thread(), shard))
+            self._local.shard = shard
+            return shard
+
+    @staticmethod
+    def _add(into, cells):
+        for labels, cell in list(cells.items()):
+            total = into.get(labels)
+            if total is None:
+                into[labels] = list(cell)
+            else:
+                for i, value in enumerate(cell):
+                    total[i] += value
+
+    def _retire_finished(self):
+        # Keeps the shard list as long as the number of live threads, for
+        # servers that start a thread per request
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                self._add(self._retired, shard)
+        self._shards = live
+
+    def _merged(self):
+        """Cells summed over all thread shards, by label values."""
+        with self._shards_lock:
+            self._retire_finished()
+            merged = {}
+            self._add(merged, self._retired)
+            shards = [shard for _, shard in self._shards]
+        for shard in shards:
+            self._add(merged, shard)
+        return merged
+
+    def _after_fork(self):
+        # The parent's threads do not exist in the child; its lock may be held
+        self._shards_lock = threading.Lock()
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for labels, cell in sorted(self._merged().items()):
+            lines.extend(self._samples(labels, cell))
+        return lines
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            cell = shard[labels] = [0]
+        cell[0] += amount
+
+    def value(self, *labels):
+        return self._merged().get(labels, [0])[0]
+
+    def _samples(self, labels, cell):
+        return [f'{self.name}{_format_labels(self.labelnames, labels)} {_format_value(cell[0])}']
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # Per-bucket counts, one overflow bucket, then the sum
+            cell = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self, *labels):
+        """Context manager observing the duration of its block."""
+        return _Timer(self, labels)
+
+    def snapshot(self, *labels):
+        """``(count, sum)`` for one label set."""
+        cell = self._merged().get(labels)
+        if cell is None:
+            return 0, 0.0
+        return sum(cell[:-1]), cell[-1]
+
+    def _samples(self, labels, cell):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), cell[:-1]):
+            cumulative += count
+            le = (('le', _format_value(float(bound))),)
+            lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}')
+        label_text = _format_labels(self.labelnames, labels)
+        lines.append(f'{self.name}_sum{label_text} {_format_value(cell[-1])}')
+        lines.append(f'{self.name}_count{label_text} {cumulative}')
+        return lines
+
+
+class _Timer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class MetricsRegistry:
+    """Named metrics of this process; counter names end in ``_total``."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, documentation, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric {name} is already registered with another type or labels")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get(Counter, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def register_collector(self, collector):
+        """Add a function returning ``(name, type, help, [(labels dict, value), ...])`` tuples."""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def _after_fork(self):
+        self._lock = threading.Lock()
+        for metric in self._metrics.values():
+            metric._after_fork()
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, type_name, documentation, samples in collector():
+                lines.append(f'# HELP {name} {documentation}')
+                lines.append(f'# TYPE {name} {type_name}')
+                for labels, value in samples:
+                    label_text = _format_labels(list(labels), list(labels.values()))
+                    lines.append(f'{name}{label_text} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+metrics = MetricsRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=metrics._after_fork)
+
+# Time spent in each step of serving a prediction (form parsing, cache,
+# model lookup, feature pipeline, scaling, model or tree engine)
+PREDICTION_STAGE_SECONDS = metrics.histogram(
+    'prediction_stage_seconds', 'Time spent per stage of the prediction path.', ['stage']
+)
@@ -0,0 +1,211 @@
+"""Sliding-window rate limits for the authentication endpoints.
+
+Each key (a rule name plus a client IP or username) keeps two counters: the
+attempts in the current fixed window and in the previous one. The sliding
+estimate weights the previous window by how much of it still overlaps the
+last ``window`` seconds:
+
+    estimate = previous * (1 - elapsed / window) + current
+
+This is three integers per key instead of one timestamp per attempt.
+
+Counters live in a per-process LRU (``RATE_LIMIT_MAX_KEYS`` keys) or, when
+``RATE_LIMIT_PATH`` is set, in a SQLite file shared by all workers on the
+host, so a client cannot spread its attempts over the workers. If the shared
+file fails, the per-process store is used instead and the error is logged.
+"""
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from utils.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_REJECTIONS = metrics.counter(
+    'rate_limit_rejections_total', 'Requests refused by a rate limit, by rule.', ['rule']
+)
+
+
+def _roll(window_no, current, previous, now_no):
+    """Counters moved forward to window ``now_no``."""
+    if now_no == window_no:
+        return current, previous
+    if now_no == window_no + 1:
+        return 0, current
+    return 0, 0
+
+
+def _estimate(current, previous, offset, window):
+    return previous * (1.0 - offset / window) + current
+
+
+def retry_after(current, previous, offset, window, limit):
+    """Seconds until one more attempt would be allowed, if none are made meanwhile."""
+    target = limit - 1
+    if current > target:
+        # Wait for the next window, then for ``current`` to decay enough there
+        wait = window - offset + window * (1.0 - target / current)
+    else:
+        wait = window * (1.0 - (target - current) / previous) - offset if previous else 0.0
+    return max(1, math.ceil(wait))
+
+
+class LocalWindowStore:
+    """Per-process counters, least recently used keys evicted beyond ``maxsize``."""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, window, amount, now):
+        """Add ``amount`` to ``key``; returns ``(current, previous)`` afterwards."""
+        now_no = int(now // window)
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None and not amount:
+                return 0, 0
+            current, previous = _roll(*entry, now_no) if entry is not None else (0, 0)
+            current += amount
+            self._data[key] = (now_no, current, previous)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return current, previous
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteWindowStore:
+    """Counters in a SQLite file shared by every process on the host.
+
+    Like SQLiteCache, each thread (and each process after a fork) opens its
+    own connection. A hit is one write transaction, so concurrent workers
+    never lose an update.
+    """
+
+    def __init__(self, path, timeout=1.0, trim_every=1024):
+        self.path = path
+        self.timeout = timeout
+        self.trim_every = trim_every
+        self._writes = 0
+        self._local = threading.local()
+        self._counter_lock = threading.Lock()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limits ('
+                ' key TEXT PRIMARY KEY, window_no INTEGER NOT NULL,'
+                ' current INTEGER NOT NULL, previous INTEGER NOT NULL, expires REAL NOT NULL)'
+            )
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def hit(self, key, window, amount, now):
+        now_no = int(now // window)
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT window_no, current, previous FROM rate_limits WHERE key = ?',
+                               (key,)).fetchone()
+            if row is None and not amount:
+                conn.execute('COMMIT')
+                return 0, 0
+            current, previous = _roll(*row, now_no) if row is not None else (0, 0)
+            current += amount
+            # Useless once two windows have passed
+            conn.execute('INSERT OR REPLACE INTO rate_limits VALUES (?, ?, ?, ?, ?)',
+                         (key, now_no, current, previous, (now_no + 2) * window))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        with self._counter_lock:
+            self._writes += 1
+            trim = self._writes % self.trim_every == 0
+        if trim:
+            conn.execute('DELETE FROM rate_limits WHERE expires <= ?', (now,))
+        return current, previous
+
+    def clear(self):
+        self._connection().execute('DELETE FROM rate_limits')
+
+
+class RateLimiter:
+    """Named limits of ``(max attempts, window seconds)`` applied per key."""
+
+    def __init__(self, rules=None, max_keys=100000, shared_path=None, enabled=True):
+        self.rules = dict(rules or {})
+        self.enabled = enabled
+        self.shared_errors = 0
+        self.configure(max_keys, shared_path)
+
+    def configure(self, max_keys, shared_path=None):
+        self.local = LocalWindowStore(max_keys)
+        self.shared = SQLiteWindowStore(shared_path) if shared_path else None
+
+    def init_app(self, app):
+        config = app.config
+        window = config.get('RATE_LIMIT_WINDOW', 300)
+        self.rules = {
+            'login_ip': (config.get('RATE_LIMIT_LOGIN_PER_IP', 30), window),
+            'login_username': (config.get('RATE_LIMIT_LOGIN_PER_USERNAME', 5), window),
+            'register_ip': (config.get('RATE_LIMIT_REGISTER_PER_IP', 10), window),
+        }
+        self.enabled = config.get('RATE_LIMIT_ENABLED', self.enabled)
+        self.configure(config.get('RATE_LIMIT_MAX_KEYS', 100000), config.get('RATE_LIMIT_PATH'))
+        app.extensions['rate_limiter'] = self
+
+    def _hit(self, key, window, amount, now):
+        if self.shared is not None:
+            try:
+                return self.shared.hit(key, window, amount, now)
+            except Exception as e:
+                self.shared_errors += 1
+                logger.warning("Shared rate limit store failed, using the local one: %s", e)
+        return self.local.hit(key, window, amount, now)
+
+    def _apply(self, rule, value, amount):
+        if not self.enabled or rule not in self.rules:
+            return 0
+        limit, window = self.rules[rule]
+        if limit <= 0:
+            return 0
+        now = time.time()
+        current, previous = self._hit(f"{rule}:{value}", window, amount, now)
+        offset = now % window
+        if _estimate(current, previous, offset, window) <= limit - (1 if amount == 0 else 0):
+            return 0
+        RATE_LIMIT_REJECTIONS.inc(rule)
+        return retry_after(current, previous, offset, window, limit)
+
+    def hit(self, rule, value):
+        """Count one attempt; returns 0 if it is within the limit, else seconds to wait."""
+        return self._apply(rule, value, 1)
+
+    def check(self, rule, value):
+        """Like ``hit`` without counting, for limits on failed attempts only."""
+        return self._apply(rule, value, 0)
+
+    def clear(self):
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+
+
+limiter = RateLimiter()
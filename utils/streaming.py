@@ -0,0 +1,76 @@
+import codecs
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+
+
+def iter_json_records(stream, array=True, read_size=64 * 1024, max_record_size=1024 * 1024):
+    """Yield JSON values one at a time from a file-like byte stream.
+
+    With ``array=True`` the body is a single JSON array and its elements are
+    yielded; otherwise the body is NDJSON (one value per line). Only a
+    bounded window of the body is held in memory, so arbitrarily large
+    uploads can be processed while they are still being received.
+    Raises ValueError on malformed input, or once a single value grows past
+    ``max_record_size`` characters without being complete.
+    """
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    buf, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        data = stream.read(read_size)
+        if not data:
+            eof = True
+        buf = buf[pos:] + utf8.decode(data or b'', final=not data)
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            fill()
+
+    if array:
+        skip_ws()
+        if pos >= len(buf) or buf[pos] != '[':
+            raise ValueError("Expected a JSON array")
+        pos += 1
+        skip_ws()
+        if pos < len(buf) and buf[pos] == ']':
+            return
+
+    while True:
+        skip_ws()
+        if pos >= len(buf):
+            if array:
+                raise ValueError("Unterminated JSON array")
+            return
+        while True:
+            try:
+                value, end = _decoder.raw_decode(buf, pos)
+                # A scalar at the end of the window may still be incomplete.
+                if end < len(buf) or eof or isinstance(value, (dict, list)):
+                    break
+            except json.JSONDecodeError as e:
+                if eof:
+                    raise ValueError(f"Malformed JSON: {e.msg}")
+            # The window only grows while one value is incomplete
+            if len(buf) - pos > max_record_size:
+                raise ValueError(f"Record exceeds {max_record_size} characters")
+            fill()
+        pos = end
+        yield value
+        if array:
+            skip_ws()
+            if pos >= len(buf):
+                raise ValueError("Unterminated JSON array")
+            if buf[pos] == ']':
+                return
+            if buf[pos] != ',':
+                raise ValueError("Expected ',' between array elements")
+            pos += 1
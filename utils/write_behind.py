@@ -0,0 +1,290 @@
+"""In-process write-behind queue for fire-and-forget Mongo inserts.
+
+Requests hand documents to ``write_behind.insert(collection, doc)`` and
+return immediately. One writer thread per process batches them into
+``insert_many`` calls, flushing whenever ``batch_size`` documents are
+queued or the oldest has waited ``flush_interval`` seconds.
+
+Memory is bounded by ``max_pending`` queued documents. When the queue is
+full, callers block for up to ``put_timeout`` seconds (backpressure) and
+the document is then spilled to disk instead. Batches that fail to insert
+are spilled too. Spill files are JSON lines (bson.json_util) under
+``spill_dir``. The writer replays them every ``retry_interval`` seconds and
+at startup, and duplicate keys count as already written, so a replay after
+a partial insert is harmless. Files left claimed by a process that died
+mid-replay are taken back; unreadable files are renamed to ``.bad``.
+Pending documents are flushed at interpreter exit.
+"""
+import atexit
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+
+from bson import ObjectId, json_util
+from flask import current_app
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+# At most one "queue full" warning per this many seconds
+OVERFLOW_LOG_INTERVAL = 10.0
+
+
+class WriteBehindQueue:
+    def __init__(self, batch_size=500, flush_interval=0.25, max_pending=10000,
+                 put_timeout=1.0, spill_dir='spill', retry_interval=60.0):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.put_timeout = put_timeout
+        self.spill_dir = spill_dir
+        self.retry_interval = retry_interval
+        self.app = None
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self._stopping = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._counters = dict.fromkeys(
+            ('enqueued', 'written', 'batches', 'failed_batches', 'overflow', 'spilled', 'replayed',
+             'bad_files'), 0
+        )
+        self._atexit_registered = False
+        self._overflow_logged_at = 0.0
+
+    def init_app(self, app):
+        config = app.config
+        self.batch_size = config.get('WRITE_BEHIND_BATCH_SIZE', self.batch_size)
+        self.flush_interval = config.get('WRITE_BEHIND_FLUSH_INTERVAL', self.flush_interval)
+        self.max_pending = config.get('WRITE_BEHIND_MAX_PENDING', self.max_pending)
+        self.put_timeout = config.get('WRITE_BEHIND_PUT_TIMEOUT', self.put_timeout)
+        self.spill_dir = config.get('WRITE_BEHIND_SPILL_DIR', self.spill_dir)
+        self.retry_interval = config.get('WRITE_BEHIND_RETRY_INTERVAL', self.retry_interval)
+        self.app = app
+        app.extensions['write_behind'] = self
+        if not self._atexit_registered:
+            atexit.register(self.shutdown)
+            self._atexit_registered = True
+
+    # -----------------------
+    # Producer side
+    # -----------------------
+    def _start(self):
+        # One queue and writer thread per process, recreated after fork
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    if self.app is None:
+                        self.app = current_app._get_current_object()
+                    self._queue = queue.Queue(maxsize=self.max_pending)
+                    self._stopping = threading.Event()
+                    self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                    self._thread.start()
+                    self._pid = os.getpid()
+        return self._queue
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self._counters[name] += n
+
+    def insert(self, collection, doc):
+        """Queue ``doc`` for insertion into ``collection``; never raises for Mongo errors."""
+        q = self._start()
+        try:
+            q.put((collection, doc), timeout=self.put_timeout)
+            self._count('enqueued')
+        except queue.Full:
+            self._count('overflow')
+            now = time.monotonic()
+            if now - self._overflow_logged_at >= OVERFLOW_LOG_INTERVAL:
+                self._overflow_logged_at = now
+                logger.warning("Write-behind queue full (%d pending); spilling %s documents to disk",
+                               self.max_pending, collection)
+            self._spill(collection, [doc])
+
+    def flush(self, timeout=None):
+        """Wait until everything queued so far is written or spilled."""
+        q = self._queue
+        if q is None or self._pid != os.getpid():
+            return True
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with q.all_tasks_done:
+            while q.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                q.all_tasks_done.wait(remaining)
+        return True
+
+    def shutdown(self, timeout=10.0):
+        """Flush, stop the writer and spill whatever could not be written in time."""
+        if self._queue is None or self._pid != os.getpid():
+            return
+        self.flush(timeout)
+        self._stopping.set()
+        self._thread.join(timeout=self.flush_interval + 1.0)
+        leftovers = {}
+        while True:
+            try:
+                collection, doc = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            leftovers.setdefault(collection, []).append(doc)
+            self._queue.task_done()
+        for collection, docs in leftovers.items():
+            self._spill(collection, docs)
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._counters)
+        stats['pending'] = self._queue.qsize() if self._queue is not None and self._pid == os.getpid() else 0
+        stats['max_pending'] = self.max_pending
+        return stats
+
+    # -----------------------
+    # Writer thread
+    # -----------------------
+    def _db(self):
+        from utils.db import get_db
+        with self.app.app_context():
+            return get_db()
+
+    def _run(self):
+        q = self._queue
+        last_replay = 0.0
+        while not (self._stopping.is_set() and q.empty()):
+            if time.monotonic() - last_replay >= self.retry_interval:
+                last_replay = time.monotonic()
+                self.replay_spilled()
+            try:
+                first = q.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            batch = [first]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(q.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                self._write(batch)
+            finally:
+                for _ in batch:
+                    q.task_done()
+
+    def _write(self, batch):
+        by_collection = {}
+        for collection, doc in batch:
+            by_collection.setdefault(collection, []).append(doc)
+        for collection, docs in by_collection.items():
+            failed = self._insert_many(collection, docs)
+            self._count('batches')
+            self._count('written', len(docs) - len(failed))
+            if failed:
+                self._count('failed_batches')
+                self._spill(collection, failed)
+
+    def _insert_many(self, collection, docs):
+        """Insert ``docs``; returns the documents that were not written."""
+        try:
+            self._db()[collection].insert_many(docs, ordered=False)
+            return []
+        except BulkWriteError as e:
+            errors = [err for err in e.details.get('writeErrors', []) if err.get('code') != DUPLICATE_KEY]
+            if errors:
+                logger.error("Write-behind insert into %s failed for %d of %d documents: %s",
+                             collection, len(errors), len(docs), errors[0].get('errmsg'))
+            return [docs[err['index']] for err in errors]
+        except Exception as e:
+            logger.error("Write-behind insert into %s failed: %s", collection, e)
+            return docs
+
+    # -----------------------
+    # Spill files
+    # -----------------------
+    def _spill(self, collection, docs):
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            name = f"{collection}.{int(time.time() * 1000)}.{os.getpid()}.{uuid.uuid4().hex[:8]}.jsonl"
+            path = os.path.join(self.spill_dir, name)
+            with open(path + '.tmp', 'w') as f:
+                for doc in docs:
+                    # A fixed _id makes replaying the file idempotent
+                    doc.setdefault('_id', ObjectId())
+                    f.write(json_util.dumps(doc) + '\n')
+            os.replace(path + '.tmp', path)
+            self._count('spilled', len(docs))
+        except Exception as e:
+            logger.error("Could not spill %d %s documents: %s", len(docs), collection, e)
+
+    @staticmethod
+    def _pid_alive(pid):
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+
+    def _reclaim_abandoned(self):
+        """Put back files whose replaying process died before finishing them."""
+        for claimed in glob.glob(os.path.join(self.spill_dir, '*.jsonl.*.replaying')):
+            path, pid = claimed[:-len('.replaying')].rsplit('.', 1)
+            try:
+                pid = int(pid)
+            except ValueError:
+                continue
+            # Replays run on the writer thread only, so a file claimed by
+            # this pid is left over from an earlier process that had it
+            if pid != os.getpid() and self._pid_alive(pid):
+                continue
+            try:
+                os.rename(claimed, path)
+                logger.warning("Reclaimed %s from a replay that did not finish", path)
+            except OSError:
+                continue
+
+    def replay_spilled(self):
+        """Insert spilled documents again; files are removed once written."""
+        self._reclaim_abandoned()
+        for path in sorted(glob.glob(os.path.join(self.spill_dir, '*.jsonl'))):
+            claimed = f"{path}.{os.getpid()}.replaying"
+            try:
+                # Only one process replays a given file
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            collection = os.path.basename(path).split('.', 1)[0]
+            try:
+                with open(claimed) as f:
+                    docs = [json_util.loads(line) for line in f if line.strip()]
+            except Exception as e:
+                # Kept for inspection, out of the replay's way
+                logger.error("Unreadable spill file %s, moved to %s.bad: %s", path, path, e)
+                self._count('bad_files')
+                try:
+                    os.rename(claimed, path + '.bad')
+                except OSError:
+                    pass
+                continue
+            failed = self._insert_many(collection, docs) if docs else []
+            if failed:
+                os.rename(claimed, path)
+                logger.warning("Replay of %s failed; will retry", path)
+                return
+            os.remove(claimed)
+            self._count('replayed', len(docs))
+
+write_behind = WriteBehindQueue()
@@ -0,0 +1,17 @@
+"""WSGI entry point for production: ``gunicorn -c gunicorn.conf.py wsgi:app``.
+
+With ``preload_app`` gunicorn imports this module once in the master
+process, so the model loaded here is inherited by every forked worker and
+its arrays are shared copy-on-write instead of loaded once per worker.
+"""
+from app import create_app
+from models.registry import model_registry
+
+app = create_app()
+
+if app.config['MODEL_PRELOAD']:
+    try:
+        model_registry.get()
+    except Exception as e:
+        # Start anyway; workers load the model on first use and /readyz reports the error
+        app.logger.error(f"Model preload failed: {e}")